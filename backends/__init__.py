@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import Optional
 
 
 class AbstractBackendResult(ABC):
@@ -15,3 +16,9 @@ class AsyncAbstractBackend(ABC):
     @abstractmethod
     async def get(self) -> AbstractBackendResult:
         pass
+
+    async def probe(self) -> Optional[int]:
+        return None
+
+    def stream_source(self) -> Optional[str]:
+        return None
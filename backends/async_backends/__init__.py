@@ -1,12 +1,33 @@
+from typing import Optional
+
 from backends import AbstractBackendResult
+from backends.executors import backend_limit
 
 
 class AsyncSaverBackend:
     def __init__(self, backend):
         self.backend = backend
 
+    @property
+    def path(self) -> str:
+        return self.backend.path
+
+    @path.setter
+    def path(self, path: str) -> None:
+        self.backend.path = path
+
+    async def probe(self) -> Optional[int]:
+        # Resolution (pytube, Yandex API, Instagram lookups) happens here.
+        async with backend_limit(self.backend.BACKEND_NAME):
+            return await self.backend.probe()
+
+    def stream_source(self) -> Optional[str]:
+        return self.backend.stream_source()
+
     async def get(self) -> AbstractBackendResult:
-        return await self.backend.get()
+        async with backend_limit(self.backend.BACKEND_NAME):
+            return await self.backend.get()
 
     async def get_link(self) -> str:
-        return await self.backend.get_link()
+        async with backend_limit(self.backend.BACKEND_NAME):
+            return await self.backend.get_link()
@@ -1,75 +1,132 @@
+import json
 import os
+import time
 import traceback
 import uuid
-from typing import Dict
+from collections import Counter
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
 
-import httpx
 from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.wait import WebDriverWait
-from webdriver_manager.chrome import ChromeDriverManager
 
 from backends import AbstractBackendResult, AsyncAbstractBackend
+from backends.browser_pool import browser_pool
+from backends.downloader import downloader
 from backends.exceptions import ObjectNotFound
+from backends.executors import run_io
+from backends.extractors.instagram import extract_video_url
+from backends.http import get_http_client
+from backends.logs import logger
+
+RESOLVERS = Counter()
+
+# Progressive videos are fetched in byte ranges; dropping them yields the file.
+_RANGE_PARAMS = ("bytestart", "byteend")
+
+
+def media_url_from_event(event: Dict) -> Optional[str]:
+    message = json.loads(event["message"])["message"]
+    params = message.get("params", {})
+    if message.get("method") == "Network.requestWillBeSent":
+        url = params.get("request", {}).get("url", "")
+        is_video = params.get("type") == "Media"
+    elif message.get("method") == "Network.responseReceived":
+        response = params.get("response", {})
+        url = response.get("url", "")
+        is_video = params.get("type") == "Media" or response.get(
+            "mimeType", ""
+        ).startswith("video/")
+    else:
+        return None
+    if not url.startswith("http"):
+        return None
+    if not is_video and not urlparse(url).path.endswith(".mp4"):
+        return None
+    parsed = urlparse(url)
+    query = [(k, v) for k, v in parse_qsl(parsed.query) if k not in _RANGE_PARAMS]
+    return urlunparse(parsed._replace(query=urlencode(query)))
 
 
 class InstagramBackendResult(AbstractBackendResult):
-    def __init__(self, link: str, file: str):
+    def __init__(self, link: str, file: str, resolver: str):
         self.link = link
         self.file = file
+        self.resolver = resolver
 
 
 class AsyncInstagramBackend(AsyncAbstractBackend):
 
-    BACKEND_URIS = ["instagram"]
+    BACKEND_NAME = "instagram"
 
     def __init__(self, link: str, path: str):
         self.link = link
         self.path = path
+        self.post: Optional[str] = None
+        self.resolver: Optional[str] = None
 
     async def _get_file(self, post) -> Dict:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(post)
-            self.file_path = os.path.join(self.path, f"{str(uuid.uuid4())}.mp4")
-            open(self.file_path, "wb").write(response.content)
-            return dict(file_path=self.file_path)
-
-    async def _find_object(self) -> str:
-        try:
-            options = Options()
-            options.add_argument("--headless")
-            options.add_argument("--no-sandbox")
-            options.add_argument("--disable-dev-shm-usage")
-            driver = webdriver.Chrome(
-                service=Service(ChromeDriverManager().install()), options=options
-            )
-
-            driver.get(self.link)
-            try:
-                video: WebElement = WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "video"))
-                )
-                url = video.get_property("src")
-            finally:
-                driver.quit()
-            return url
-
-        except Exception:
-            traceback.print_exc()
+        self.file_path = os.path.join(self.path, f"{str(uuid.uuid4())}.mp4")
+        await downloader.download(post, self.file_path)
+        return dict(file_path=self.file_path)
+
+    def _find_video_url(self, driver: webdriver.Chrome) -> str:
+        driver.get(self.link)
+        deadline = time.monotonic() + float(
+            os.environ.get("INSTAGRAM_CAPTURE_TIMEOUT", 10)
+        )
+        while time.monotonic() < deadline:
+            for event in driver.get_log("performance"):
+                url = media_url_from_event(event)
+                if url:
+                    return url
+            time.sleep(0.1)
+        # No media request seen; fall back to whatever the player element holds.
+        video: WebElement = WebDriverWait(driver, 1).until(
+            EC.presence_of_element_located((By.TAG_NAME, "video"))
+        )
+        src = video.get_property("src")
+        if not src or src.startswith("blob:"):
             raise ObjectNotFound
+        return src
+
+    async def _find_object(self) -> Tuple[str, str]:
+        url: Optional[str] = await extract_video_url(get_http_client(), self.link)
+        resolver = "http"
+        if url is None:
+            resolver = "browser"
+            try:
+                async with browser_pool.session() as driver:
+                    url = await run_io(self._find_video_url, driver)
+            except Exception:
+                traceback.print_exc()
+                raise ObjectNotFound
+        RESOLVERS[resolver] += 1
+        logger.info(f"Instagram video resolved by {resolver} - {self.link}")
+        return url, resolver
+
+    async def probe(self) -> Optional[int]:
+        self.post, self.resolver = await self._find_object()
+        size, _ = await downloader.probe(self.post)
+        return size
+
+    def stream_source(self) -> Optional[str]:
+        return self.post
 
     async def get(self) -> InstagramBackendResult:
-        post: str = await self._find_object()
+        if self.post is None:
+            self.post, self.resolver = await self._find_object()
+        post, resolver = self.post, self.resolver
         downloaded: Dict = await self._get_file(post=post)
         return InstagramBackendResult(
             link=self.link,
             file=downloaded["file_path"],
+            resolver=resolver,
         )
 
     async def get_link(self) -> str:
-        link: str = await self._find_object()
+        link, _ = await self._find_object()
         return link
@@ -1,35 +1,99 @@
+import asyncio
 import os
 import traceback
 import urllib
-from typing import Dict, List, Callable
+from io import BytesIO
+from typing import Any, Awaitable, Dict, List, Callable, Optional
 from urllib.parse import urlencode, urlparse, urlunparse, parse_qs
 
-import mutagen
-from mutagen.easyid3 import EasyID3
-from mutagen.id3 import ID3NoHeaderError, APIC, ID3
-from yandex_music import Client, Track, DownloadInfo
+from mutagen.id3 import APIC, ID3, TALB, TIT2, TPE1
+from yandex_music import ClientAsync, Track, DownloadInfo
+from yandex_music.exceptions import UnauthorizedError
 
 from backends import AbstractBackendResult, AsyncAbstractBackend
+from backends.downloader import downloader
 from backends.exceptions import ObjectNotFound
+from backends.executors import run_io
+from backends.keys import yandex_music_track_id
+from backends.logs import logger
+from backends.segmented import segmented_downloader
+from cache import TTLCache
+
+# Track metadata barely changes; direct links are signed and expire quickly.
+track_cache = TTLCache(
+    maxsize=int(os.environ.get("YANDEX_TRACK_CACHE_SIZE", 10000)),
+    ttl=float(os.environ.get("YANDEX_TRACK_CACHE_TTL", 3600)),
+)
+link_cache = TTLCache(
+    maxsize=int(os.environ.get("YANDEX_LINK_CACHE_SIZE", 10000)),
+    ttl=float(os.environ.get("YANDEX_LINK_CACHE_TTL", 60)),
+)
+cover_cache = TTLCache(
+    maxsize=int(os.environ.get("YANDEX_COVER_CACHE_SIZE", 1000)),
+    ttl=float(os.environ.get("YANDEX_COVER_CACHE_TTL", 3600)),
+)
+
+_client: Optional[ClientAsync] = None
+_client_lock: Optional[asyncio.Lock] = None
+
+
+async def get_client(reset: bool = False) -> ClientAsync:
+    global _client, _client_lock
+    if _client_lock is None:
+        _client_lock = asyncio.Lock()
+    async with _client_lock:
+        if _client is None or reset:
+            client = ClientAsync(token=os.environ.get("YANDEX_MUSIC_TOKEN"))
+            _client = await client.init()
+            logger.info("Yandex Music client initialised")
+        return _client
+
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    return dict(
+        tracks=track_cache.stats(),
+        links=link_cache.stats(),
+        covers=cover_cache.stats(),
+    )
+
+
+async def get_cover(track: Track) -> Optional[bytes]:
+    # Keyed by cover URI so every track of an album shares one download.
+    if not track.cover_uri:
+        return None
+    cover: Optional[bytes] = cover_cache.get(track.cover_uri)
+    if cover is None:
+        cover = await track.download_cover_bytes_async()
+        cover_cache.set(track.cover_uri, cover)
+    return cover
 
 
 class YandexMusicBackendResult(AbstractBackendResult):
-    def __init__(self, link: str, file: str, title: str, track: Track):
+    def __init__(
+        self,
+        link: str,
+        file: str,
+        title: str,
+        track: Track,
+        cover: Optional[bytes] = None,
+    ):
         self.link = link
         self.file = file
         self.title = title
         self.track = track
+        self.cover = cover
 
 
 class AsyncYandexMusicBackend(AsyncAbstractBackend):
 
-    BACKEND_URIS = ["yandex"]
+    BACKEND_NAME = "yandex_music"
 
     def __init__(self, link: str, path: str):
         self.link = link
-        self.token = os.environ.get("YANDEX_MUSIC_TOKEN")
-        self.backend: Client = Client(token=self.token).init()
         self.path = path
+        self.track: Optional[Track] = None
+        self.direct_link: Optional[str] = None
+        self.size: Optional[int] = None
 
     async def _get_file(self, track: Track) -> Dict:
         title = track.title
@@ -40,73 +104,121 @@ class AsyncYandexMusicBackend(AsyncAbstractBackend):
             .replace("'", "")
         )
         self.file_path = os.path.join(self.path, f"{artist} - {title}.mp3")
-        max_bitrate = self._get_max_bitrate()
-        track.download(filename=self.file_path, bitrate_in_kbps=max_bitrate)
-        await self._add_id3_tags(track=track)
-        return dict(file_path=self.file_path, title=title, track=track)
+        if self.direct_link is None:
+            self.direct_link = await self._get_direct_link()
+        cover: Optional[bytes] = await get_cover(track)
+        # Tags are built up front and written ahead of the audio in one pass.
+        tag: bytes = await run_io(self._build_id3_tag, track=track, cover=cover)
+        await segmented_downloader.download(
+            self.direct_link, self.file_path, size=self.size, header=tag
+        )
+        return dict(file_path=self.file_path, title=title, track=track, cover=cover)
 
-    async def _add_id3_tags(self, track: Track):
-        try:
-            meta = EasyID3(self.file_path)
-        except ID3NoHeaderError:
-            meta: mutagen.File = mutagen.File(self.file_path, easy=True)
-            meta.add_tags()
-        meta["title"] = track.title
-        meta["artist"] = (
-            str([artist["name"] for artist in track.artists])
-            .replace("[", "")
-            .replace("]", "")
-            .replace("'", "")
+    @staticmethod
+    def _build_id3_tag(track: Track, cover: Optional[bytes]) -> bytes:
+        tag = ID3()
+        tag.add(TIT2(encoding=3, text=track.title))
+        tag.add(
+            TPE1(
+                encoding=3,
+                text=(
+                    str([artist["name"] for artist in track.artists])
+                    .replace("[", "")
+                    .replace("]", "")
+                    .replace("'", "")
+                ),
+            )
         )
-        meta["album"] = (
-            str([album["title"] for album in track.albums])
-            .replace("[", "")
-            .replace("]", "")
-            .replace("'", "")
+        tag.add(
+            TALB(
+                encoding=3,
+                text=(
+                    str([album["title"] for album in track.albums])
+                    .replace("[", "")
+                    .replace("]", "")
+                    .replace("'", "")
+                ),
+            )
         )
-        meta.save(self.file_path, v1=2)
+        if cover:
+            tag.add(
+                APIC(
+                    encoding=3,
+                    mime="image/jpeg",
+                    type=3,
+                    desc="Front cover",
+                    data=cover,
+                )
+            )
+        buffer = BytesIO()
+        tag.save(buffer, padding=lambda info: 0)
+        return buffer.getvalue()
 
-        meta_pic = ID3(self.file_path)
-        picture = track.download_cover_bytes()
-        meta_pic["APIC"] = APIC(
-            encoding=3, mime="image/jpeg", type=3, desc="Front cover", data=picture
+    @staticmethod
+    async def _with_client(call: Callable[[ClientAsync], Awaitable[Any]]) -> Any:
+        try:
+            return await call(await get_client())
+        except UnauthorizedError:
+            return await call(await get_client(reset=True))
+
+    async def _get_best_download_info(self) -> DownloadInfo:
+        infos: List[DownloadInfo] = await self._with_client(
+            lambda client: client.tracks_download_info(self.track_id)
+        )
+        info = max(
+            (info for info in infos if info.codec == "mp3"),
+            key=lambda info: info.bitrate_in_kbps,
+            default=None,
         )
-        meta_pic.save()
+        if info is None:
+            raise ObjectNotFound
+        return info
 
-    def _get_max_bitrate(self) -> int:
-        codecs: List[DownloadInfo] = self.backend.tracks_download_info(self.track_id)
-        max_bitrate = 0
-        for codec in codecs:
-            if codec["bitrate_in_kbps"] > max_bitrate:
-                max_bitrate = codec["bitrate_in_kbps"]
-        return max_bitrate
+    async def _get_direct_link(self) -> str:
+        direct_link: Optional[str] = link_cache.get(self.track_id)
+        if direct_link is None:
+            info: DownloadInfo = await self._get_best_download_info()
+            direct_link = await info.get_direct_link_async()
+            link_cache.set(self.track_id, direct_link)
+        return direct_link
 
     async def _find_object(self) -> Track:
         try:
-            url = urlparse(self.link)
-            self.track_id = int(os.path.split(url.path)[1])
-            return self.backend.tracks([self.track_id])[0]
+            # Same parser as the cache key, so /album/1/track/123/ works too.
+            self.track_id = yandex_music_track_id(urlparse(self.link))
+            if self.track_id is None:
+                raise ObjectNotFound
+            track: Optional[Track] = track_cache.get(self.track_id)
+            if track is None:
+                tracks: List[Track] = await self._with_client(
+                    lambda client: client.tracks([self.track_id])
+                )
+                track = tracks[0]
+                track_cache.set(self.track_id, track)
+            return track
         except Exception:
             traceback.print_exc()
             raise ObjectNotFound
 
+    async def probe(self) -> Optional[int]:
+        self.track = await self._find_object()
+        self.direct_link = await self._get_direct_link()
+        size, ranges = await downloader.probe(self.direct_link)
+        # Only hand the size on when the segmented engine may rely on ranges.
+        self.size = size if ranges else None
+        return size
+
     async def get(self) -> YandexMusicBackendResult:
-        track: Track = await self._find_object()
+        track: Track = self.track or await self._find_object()
         downloaded: Dict = await self._get_file(track=track)
         return YandexMusicBackendResult(
             link=self.link,
             file=downloaded["file_path"],
             title=downloaded["title"],
             track=track,
+            cover=downloaded["cover"],
         )
 
     async def get_link(self) -> str:
-        track: Track = await self._find_object()
-        infos: List[DownloadInfo] = track.get_download_info()
-        max_bitrate = 0
-        best = None
-        for info in enumerate(infos):
-            if info[1]["bitrate_in_kbps"] > max_bitrate:
-                max_bitrate = info[1]["bitrate_in_kbps"]
-                best = info[1]
-        return best.get_direct_link()
+        self.track = self.track or await self._find_object()
+        return await self._get_direct_link()
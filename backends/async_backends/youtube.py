@@ -1,11 +1,13 @@
 import os
-from typing import Dict, Callable, Any
+from typing import Dict, Callable, Any, Optional
 
 from pytube import YouTube, Stream
 from pytube.exceptions import VideoUnavailable
 
 from backends import AbstractBackendResult, AsyncAbstractBackend
 from backends.exceptions import ObjectNotFound, EntityTooLarge
+from backends.executors import run_io
+from backends.segmented import segmented_downloader
 
 
 class YoutubeBackendResult(AbstractBackendResult):
@@ -26,7 +28,7 @@ class YoutubeBackendResult(AbstractBackendResult):
 
 class AsyncYoutubeBackend(AsyncAbstractBackend):
 
-    BACKEND_URIS = ["youtube", "yt", "youtu"]
+    BACKEND_NAME = "youtube"
 
     def __init__(
         self,
@@ -40,48 +42,56 @@ class AsyncYoutubeBackend(AsyncAbstractBackend):
         self.progressive = progressive
         self.extension = extension.replace(".", "")
         self.path = path
+        self.stream: Optional[Stream] = None
 
     async def _get_file(self, stream: Stream) -> Dict:
         title = stream.title
-        self.file_path = stream.download(output_path=self.path)
+        self.file_path = os.path.join(self.path, stream.default_filename)
+        # pytube resolves the size with a blocking HEAD on first access.
+        size = await run_io(lambda: stream.filesize)
+        await segmented_downloader.download(stream.url, self.file_path, size=size)
         return dict(file_path=self.file_path, title=title, extension=self.extension)
 
+    def _find_stream(self) -> Stream:
+        return (
+            self.backend(self.link)
+            .streams.filter(progressive=self.progressive, file_extension=self.extension)
+            .order_by("resolution")
+            .desc()
+            .first()
+        )
+
     async def _find_object(self) -> Stream:
         try:
-            return (
-                self.backend(self.link)
-                .streams.filter(
-                    progressive=self.progressive, file_extension=self.extension
-                )
-                .order_by("resolution")
-                .desc()
-                .first()
-            )
+            return await run_io(self._find_stream)
         except VideoUnavailable:
             raise ObjectNotFound
 
+    async def probe(self) -> Optional[int]:
+        self.stream = await self._find_object()
+        return await run_io(lambda: self.stream.filesize)
+
+    def stream_source(self) -> Optional[str]:
+        return self.stream.url if self.stream is not None else None
+
     async def get(self) -> YoutubeBackendResult:
-        stream: Stream = await self._find_object()
-        # await self.validate_file_size(stream=stream)
+        stream: Stream = self.stream or await self._find_object()
         downloaded: Dict = await self._get_file(stream=stream)
         return YoutubeBackendResult(
             link=self.link,
             file=downloaded["file_path"],
             title=downloaded.get("title", "unknown"),
             extension=downloaded["extension"],
-            file_size=int(stream.filesize_mb),
+            file_size=int(await run_io(lambda: stream.filesize_mb)),
         )
 
     async def validate_file_size(self, stream: Stream):
-        if int(stream.filesize_mb) > int(os.environ.get("MAX_FILE_SIZE")):
+        if int(await run_io(lambda: stream.filesize_mb)) > int(
+            os.environ.get("MAX_FILE_SIZE")
+        ):
             raise EntityTooLarge
 
     async def get_link(self) -> str:
         stream: Stream = await self._find_object()
         print(stream.filesize_mb)
-        print(
-            self.backend(self.link).streams.filter(
-                progressive=self.progressive, file_extension=self.extension
-            )
-        )
         return stream.url
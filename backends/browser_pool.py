@@ -0,0 +1,192 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Callable, Optional
+
+from backends.executors import run_io
+from backends.logs import logger
+
+# selenium and webdriver_manager are imported on first use, not at startup.
+if TYPE_CHECKING:
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
+
+BLOCKED_URLS = [
+    "*.jpg*",
+    "*.jpeg*",
+    "*.png*",
+    "*.gif*",
+    "*.webp*",
+    "*.svg*",
+    "*.ico*",
+    "*.woff*",
+    "*.ttf*",
+    "*.otf*",
+    "*.css*",
+]
+
+
+def default_options() -> "Options":
+    from selenium.webdriver.chrome.options import Options
+
+    options = Options()
+    options.add_argument("--headless")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_argument("--mute-audio")
+    options.page_load_strategy = "eager"
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return options
+
+
+def block_heavy_resources(driver: "webdriver.Chrome") -> None:
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+
+
+def webdriver_error() -> type:
+    from selenium.common.exceptions import WebDriverException
+
+    return WebDriverException
+
+
+class BrowserSession:
+    def __init__(self, driver: "webdriver.Chrome"):
+        self.driver = driver
+        self.uses = 0
+
+
+class BrowserPool:
+    def __init__(
+        self,
+        size: int = int(os.environ.get("BROWSER_POOL_SIZE", 2)),
+        max_uses: int = int(os.environ.get("BROWSER_MAX_USES", 50)),
+        acquire_timeout: float = float(os.environ.get("BROWSER_ACQUIRE_TIMEOUT", 60)),
+        options: Callable[[], "Options"] = default_options,
+        prepare: Callable[["webdriver.Chrome"], None] = block_heavy_resources,
+    ):
+        self.size = size
+        self.max_uses = max_uses
+        self.acquire_timeout = acquire_timeout
+        self.options = options
+        self.prepare = prepare
+        self._driver_path: Optional[str] = None
+        self._idle: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+
+    async def start(self) -> None:
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._idle is not None:
+                return
+            if self._driver_path is None:
+                from webdriver_manager.chrome import ChromeDriverManager
+
+                self._driver_path = await run_io(ChromeDriverManager().install)
+            idle = asyncio.Queue()
+            for _ in range(self.size):
+                idle.put_nowait(await self._create())
+            self._slots = asyncio.Semaphore(self.size)
+            self._idle = idle
+        logger.info(f"Browser pool started with {self.size} sessions")
+
+    async def stop(self) -> None:
+        if self._idle is None:
+            return
+        while not self._idle.empty():
+            await self._quit(self._idle.get_nowait())
+        self._idle = None
+        self._slots = None
+
+    @asynccontextmanager
+    async def session(self):
+        await self.start()
+        await asyncio.wait_for(self._slots.acquire(), self.acquire_timeout)
+        try:
+            browser: Optional[BrowserSession] = await self._checkout()
+            browser.uses += 1
+            try:
+                yield browser.driver
+            except webdriver_error():
+                # Page errors such as a TimeoutException leave a working
+                # browser; only one that stopped answering is thrown away.
+                if not await self._healthy(browser):
+                    await self._quit(browser)
+                    browser = None
+                raise
+            finally:
+                if browser is not None:
+                    await self._checkin(browser)
+        finally:
+            self._slots.release()
+
+    async def _checkout(self) -> BrowserSession:
+        while not self._idle.empty():
+            browser: BrowserSession = self._idle.get_nowait()
+            if await self._healthy(browser):
+                return browser
+            await self._quit(browser)
+        return await self._create()
+
+    async def _checkin(self, browser: BrowserSession) -> None:
+        if browser.uses < self.max_uses:
+            try:
+                await run_io(self._reset, browser.driver)
+            except webdriver_error():
+                pass
+            else:
+                self._idle.put_nowait(browser)
+                return
+        await self._quit(browser)
+        try:
+            self._idle.put_nowait(await self._create())
+        except Exception:
+            # Never fail the lookup that just finished; _checkout relaunches.
+            logger.exception("Browser relaunch failed, retrying on next checkout")
+
+    async def _create(self) -> BrowserSession:
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+
+        driver = await run_io(
+            webdriver.Chrome,
+            service=Service(self._driver_path),
+            options=self.options(),
+        )
+        await run_io(self.prepare, driver)
+        return BrowserSession(driver=driver)
+
+    @staticmethod
+    async def _healthy(browser: BrowserSession) -> bool:
+        try:
+            return await run_io(browser.driver.execute_script, "return 1") == 1
+        except webdriver_error():
+            return False
+
+    @staticmethod
+    def _reset(driver: "webdriver.Chrome") -> None:
+        try:
+            driver.execute_script(
+                "window.localStorage && window.localStorage.clear();"
+                "window.sessionStorage && window.sessionStorage.clear();"
+            )
+        except webdriver_error():
+            pass
+        driver.delete_all_cookies()
+        driver.get("about:blank")
+        # Drop network events left over from the previous page.
+        driver.get_log("performance")
+
+    @staticmethod
+    async def _quit(browser: BrowserSession) -> None:
+        try:
+            await run_io(browser.driver.quit)
+        except webdriver_error():
+            logger.warning("Browser session did not quit cleanly")
+
+
+browser_pool = BrowserPool()
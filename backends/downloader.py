@@ -0,0 +1,60 @@
+import os
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from backends.executors import run_io
+from backends.http import get_http_client
+
+
+class Downloader:
+    def __init__(
+        self,
+        chunk_size: int = int(os.environ.get("DOWNLOAD_CHUNK_SIZE", 1024 * 1024)),
+    ):
+        self.chunk_size = chunk_size
+        self.downloads = 0
+        self.bytes_downloaded = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return get_http_client()
+
+    async def probe(self, url: str) -> Tuple[Optional[int], bool]:
+        try:
+            response = await self.client.head(url)
+            response.raise_for_status()
+        except httpx.HTTPError:
+            return None, False
+        length = response.headers.get("Content-Length")
+        ranges = response.headers.get("Accept-Ranges", "").lower() == "bytes"
+        return (int(length) if length and length.isdigit() else None), ranges
+
+    async def download(
+        self,
+        url: str,
+        file_path: str,
+        headers: Optional[Dict] = None,
+        header: bytes = b"",
+    ) -> int:
+        written = 0
+        async with self.client.stream("GET", url, headers=headers) as response:
+            response.raise_for_status()
+            file = await run_io(open, file_path, "wb")
+            try:
+                if header:
+                    await run_io(file.write, header)
+                async for chunk in response.aiter_bytes(self.chunk_size):
+                    await run_io(file.write, chunk)
+                    written += len(chunk)
+                    self.bytes_downloaded += len(chunk)
+            finally:
+                await run_io(file.close)
+        self.downloads += 1
+        return written
+
+    def stats(self) -> Dict[str, int]:
+        return dict(downloads=self.downloads, bytes_downloaded=self.bytes_downloaded)
+
+
+downloader = Downloader()
@@ -0,0 +1,66 @@
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+_backend_limits: Dict[str, asyncio.Semaphore] = {}
+
+
+def thread_pool() -> ThreadPoolExecutor:
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(
+            max_workers=int(os.environ.get("EXECUTOR_THREADS", 32)),
+            thread_name_prefix="saver-io",
+        )
+    return _thread_pool
+
+
+def process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=int(os.environ.get("EXECUTOR_PROCESSES", os.cpu_count() or 1))
+        )
+    return _process_pool
+
+
+async def _run(executor: Executor, fn: Callable, *args, **kwargs) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(fn, *args, **kwargs))
+
+
+async def run_io(fn: Callable, *args, **kwargs) -> Any:
+    return await _run(thread_pool(), fn, *args, **kwargs)
+
+
+async def run_cpu(fn: Callable, *args, **kwargs) -> Any:
+    return await _run(process_pool(), fn, *args, **kwargs)
+
+
+def backend_limit(name: str) -> asyncio.Semaphore:
+    limit = _backend_limits.get(name)
+    if limit is None:
+        limit = asyncio.Semaphore(
+            int(
+                os.environ.get(
+                    f"BACKEND_CONCURRENCY_{name.upper()}",
+                    os.environ.get("BACKEND_CONCURRENCY", 4),
+                )
+            )
+        )
+        _backend_limits[name] = limit
+    return limit
+
+
+def shutdown() -> None:
+    global _thread_pool, _process_pool
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=False, cancel_futures=True)
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+    _thread_pool = None
+    _process_pool = None
@@ -0,0 +1,91 @@
+import html
+import json
+import re
+from typing import Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from backends.keys import instagram_key
+
+_JSON_VIDEO_URL = re.compile(r'\\?"video_url\\?"\s*:\s*\\?"((?:[^"\\]|\\.)+?)\\?"')
+_META_TAG = re.compile(r"<meta\s+[^>]*>", re.IGNORECASE)
+_META_ATTR = re.compile(r'(property|name|content)\s*=\s*"([^"]*)"', re.IGNORECASE)
+_VIDEO_SRC = re.compile(r'<video[^>]+src="([^"]+)"', re.IGNORECASE)
+_OG_VIDEO_PROPERTIES = ("og:video:secure_url", "og:video", "og:video:url")
+
+
+def _unescape_json_string(value: str) -> str:
+    # Embed pages carry the payload either as plain or as doubly escaped JSON.
+    while "\\" in value:
+        try:
+            unescaped = json.loads(f'"{value}"')
+        except ValueError:
+            break
+        if unescaped == value:
+            break
+        value = unescaped
+    return value
+
+
+def _is_media_url(url: str) -> bool:
+    return url.startswith("http") and not url.startswith("blob:")
+
+
+def parse_json_video_url(page: str) -> Optional[str]:
+    for match in _JSON_VIDEO_URL.finditer(page):
+        url = _unescape_json_string(match.group(1))
+        if _is_media_url(url):
+            return url
+    return None
+
+
+def parse_og_video_url(page: str) -> Optional[str]:
+    found = {}
+    for tag in _META_TAG.findall(page):
+        attrs = {key.lower(): value for key, value in _META_ATTR.findall(tag)}
+        key = attrs.get("property") or attrs.get("name")
+        if key in _OG_VIDEO_PROPERTIES and "content" in attrs:
+            found.setdefault(key, html.unescape(attrs["content"]))
+    for key in _OG_VIDEO_PROPERTIES:
+        if key in found and _is_media_url(found[key]):
+            return found[key]
+    return None
+
+
+def parse_video_tag_url(page: str) -> Optional[str]:
+    for src in _VIDEO_SRC.findall(page):
+        url = html.unescape(src)
+        if _is_media_url(url):
+            return url
+    return None
+
+
+def parse_video_url(page: str) -> Optional[str]:
+    return (
+        parse_json_video_url(page)
+        or parse_og_video_url(page)
+        or parse_video_tag_url(page)
+    )
+
+
+def candidate_pages(link: str):
+    key = instagram_key(urlparse(link))
+    if key:
+        shortcode = key.partition(":")[2]
+        yield f"https://www.instagram.com/p/{shortcode}/embed/captioned/"
+    yield link
+
+
+async def extract_video_url(client: httpx.AsyncClient, link: str) -> Optional[str]:
+    for page_url in candidate_pages(link):
+        try:
+            response = await client.get(page_url)
+        except httpx.HTTPError:
+            continue
+        if response.status_code != 200:
+            continue
+        url = parse_video_url(response.text)
+        if url:
+            return url
+    return None
@@ -0,0 +1,40 @@
+import os
+from typing import Optional
+
+import httpx
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36"
+)
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            headers={"User-Agent": USER_AGENT},
+            follow_redirects=True,
+            http2=os.environ.get("HTTP_HTTP2", "1") == "1",
+            timeout=httpx.Timeout(
+                float(os.environ.get("HTTP_TIMEOUT", 30)),
+                connect=float(os.environ.get("HTTP_CONNECT_TIMEOUT", 10)),
+                read=float(os.environ.get("HTTP_READ_TIMEOUT", 60)),
+            ),
+            limits=httpx.Limits(
+                max_connections=int(os.environ.get("HTTP_MAX_CONNECTIONS", 100)),
+                max_keepalive_connections=int(
+                    os.environ.get("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20)
+                ),
+            ),
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+    _client = None
@@ -0,0 +1,43 @@
+import re
+from typing import Optional
+from urllib.parse import ParseResult, parse_qs
+
+_YOUTUBE_ID = re.compile(r"^[A-Za-z0-9_-]{11}$")
+_INSTAGRAM_MEDIA_PATHS = ("p", "reel", "reels", "tv")
+
+
+def youtube_key(url: ParseResult) -> Optional[str]:
+    parts = [part for part in url.path.split("/") if part]
+    video_id = None
+    if url.hostname and url.hostname.endswith("youtu.be"):
+        video_id = parts[0] if parts else None
+    elif parts and parts[0] == "watch":
+        video_id = parse_qs(url.query).get("v", [None])[0]
+    elif len(parts) > 1 and parts[0] in ("shorts", "embed", "live", "v"):
+        video_id = parts[1]
+    if video_id and _YOUTUBE_ID.match(video_id):
+        return f"youtube:{video_id}"
+    return None
+
+
+def yandex_music_track_id(url: ParseResult) -> Optional[int]:
+    parts = [part for part in url.path.split("/") if part]
+    if "track" in parts:
+        index = parts.index("track")
+        if index + 1 < len(parts) and parts[index + 1].isdigit():
+            return int(parts[index + 1])
+    return None
+
+
+def yandex_music_key(url: ParseResult) -> Optional[str]:
+    track_id = yandex_music_track_id(url)
+    return f"yandex_music:{track_id}" if track_id is not None else None
+
+
+def instagram_key(url: ParseResult) -> Optional[str]:
+    parts = [part for part in url.path.split("/") if part]
+    for index, part in enumerate(parts[:-1]):
+        if part in _INSTAGRAM_MEDIA_PATHS:
+            return f"instagram:{parts[index + 1]}"
+    return None
+
@@ -0,0 +1,127 @@
+import re
+from importlib import import_module
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Type
+from urllib.parse import ParseResult, urlparse
+
+from backends import AsyncAbstractBackend
+from backends.keys import instagram_key, yandex_music_key, youtube_key
+from backends.logs import logger
+
+# Third-party packages add backends by exposing a callable under this group;
+# it receives the registry and calls register() with "module:Class" targets.
+ENTRY_POINT_GROUP = "bsaverbot.backends"
+
+
+KeyBuilder = Callable[[ParseResult], Optional[str]]
+
+
+class BackendRoute:
+    def __init__(
+        self, target: str, paths: Iterable[str] = (), key: Optional[KeyBuilder] = None
+    ):
+        self.target = target
+        self.paths = [re.compile(path) for path in paths]
+        self.key = key
+
+    def matches(self, url: ParseResult) -> bool:
+        return not self.paths or any(path.search(url.path) for path in self.paths)
+
+
+class BackendRegistry:
+    def __init__(self, group: str = ENTRY_POINT_GROUP):
+        self.group = group
+        self._routes: Dict[str, List[BackendRoute]] = {}
+        self._backends: Dict[str, Type[AsyncAbstractBackend]] = {}
+        self._plugins_loaded = False
+
+    def register(
+        self,
+        target: str,
+        hosts: Iterable[str],
+        paths: Iterable[str] = (),
+        key: Optional[KeyBuilder] = None,
+    ) -> None:
+        route = BackendRoute(target=target, paths=paths, key=key)
+        for host in hosts:
+            self._routes.setdefault(host.lower(), []).append(route)
+
+    def resolve(self, link: str) -> Optional[Type[AsyncAbstractBackend]]:
+        self._load_plugins()
+        matched = self._match(link)
+        return self._load(matched[0].target) if matched else None
+
+    def media_key(self, link: str) -> Optional[str]:
+        # Keys come from the route, so a cache lookup never imports a backend.
+        self._load_plugins()
+        matched = self._match(link)
+        if matched is None or matched[0].key is None:
+            return None
+        route, url = matched
+        return route.key(url)
+
+    def _match(self, link: str) -> Optional[Tuple[BackendRoute, ParseResult]]:
+        try:
+            url = urlparse(link.strip())
+        except ValueError:
+            return None
+        # Exact host first, then each parent domain: m.youtube.com -> youtube.com.
+        host = (url.hostname or "").lower()
+        while host:
+            for route in self._routes.get(host, ()):
+                if route.matches(url):
+                    return route, url
+            host = host.partition(".")[2]
+        return None
+
+    def _load(self, target: str) -> Type[AsyncAbstractBackend]:
+        backend = self._backends.get(target)
+        if backend is None:
+            module, _, name = target.partition(":")
+            backend = getattr(import_module(module), name)
+            self._backends[target] = backend
+            logger.info(f"{backend.__name__} loaded")
+        return backend
+
+    def _load_plugins(self) -> None:
+        if self._plugins_loaded:
+            return
+        self._plugins_loaded = True
+        for entry_point in self._entry_points():
+            try:
+                entry_point.load()(self)
+            except Exception:
+                logger.exception(f"Backend plugin {entry_point.name} failed to load")
+
+    def _entry_points(self) -> Tuple:
+        from importlib.metadata import entry_points
+
+        found = entry_points()
+        if hasattr(found, "select"):
+            return tuple(found.select(group=self.group))
+        return tuple(found.get(self.group, ()))
+
+
+registry = BackendRegistry()
+registry.register(
+    "backends.async_backends.youtube:AsyncYoutubeBackend",
+    hosts=["youtube.com"],
+    paths=[r"^/(watch|shorts/|embed/|live/|v/)"],
+    key=youtube_key,
+)
+registry.register(
+    "backends.async_backends.youtube:AsyncYoutubeBackend",
+    hosts=["youtu.be"],
+    paths=[r"^/[A-Za-z0-9_-]+"],
+    key=youtube_key,
+)
+registry.register(
+    "backends.async_backends.yandex_music:AsyncYandexMusicBackend",
+    hosts=["music.yandex.ru", "music.yandex.com", "music.yandex.by", "music.yandex.kz"],
+    paths=[r"/track/\d+"],
+    key=yandex_music_key,
+)
+registry.register(
+    "backends.async_backends.instagram:AsyncInstagramBackend",
+    hosts=["instagram.com"],
+    key=instagram_key,
+)
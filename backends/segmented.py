@@ -0,0 +1,161 @@
+import asyncio
+import os
+from typing import List, Optional
+
+import httpx
+
+from backends.downloader import Downloader, downloader
+from backends.executors import run_io
+from backends.logs import logger
+
+
+class RangeNotSupported(Exception):
+    pass
+
+
+class SegmentedDownloader:
+    def __init__(
+        self,
+        base: Downloader = downloader,
+        segment_size: int = int(
+            os.environ.get("SEGMENT_SIZE", 4 * 1024 * 1024)
+        ),
+        min_size: int = int(os.environ.get("SEGMENTED_MIN_SIZE", 8 * 1024 * 1024)),
+        initial_workers: int = int(os.environ.get("SEGMENT_WORKERS_INITIAL", 2)),
+        max_workers: int = int(os.environ.get("SEGMENT_WORKERS_MAX", 8)),
+        retries: int = int(os.environ.get("SEGMENT_RETRIES", 3)),
+        adapt_interval: float = float(os.environ.get("SEGMENT_ADAPT_INTERVAL", 1)),
+    ):
+        self.base = base
+        self.segment_size = segment_size
+        self.min_size = min_size
+        self.initial_workers = initial_workers
+        self.max_workers = max_workers
+        self.retries = retries
+        self.adapt_interval = adapt_interval
+
+    async def download(
+        self,
+        url: str,
+        file_path: str,
+        size: Optional[int] = None,
+        header: bytes = b"",
+    ) -> int:
+        ranges = True
+        if size is None:
+            size, ranges = await self.base.probe(url)
+        if not size or not ranges or size < self.min_size:
+            return await self.base.download(url, file_path, header=header)
+        try:
+            return await self._download_segments(url, file_path, size, header)
+        except RangeNotSupported:
+            logger.info(f"Ranges ignored by server, streaming instead - {url}")
+            return await self.base.download(url, file_path, header=header)
+
+    async def _download_segments(
+        self, url: str, file_path: str, size: int, header: bytes = b""
+    ) -> int:
+        # The header occupies the start of the file; the body is shifted after it.
+        shift = len(header)
+        await run_io(self._preallocate, file_path, shift + size)
+        segments: asyncio.Queue = asyncio.Queue()
+        for start in range(0, size, self.segment_size):
+            segments.put_nowait((start, min(start + self.segment_size, size) - 1))
+        progress: List[int] = [0]
+
+        fd = await run_io(os.open, file_path, os.O_WRONLY)
+        try:
+            if header:
+                await run_io(os.pwrite, fd, header, 0)
+            workers = [
+                asyncio.create_task(self._worker(url, fd, shift, segments, progress))
+                for _ in range(min(self.initial_workers, segments.qsize()))
+            ]
+            await self._supervise(url, fd, shift, segments, progress, workers)
+        finally:
+            await run_io(os.close, fd)
+
+        written = await run_io(os.path.getsize, file_path) - shift
+        if progress[0] != size or written != size:
+            raise httpx.HTTPError(
+                f"Segmented download size mismatch: {progress[0]}/{written} of {size}"
+            )
+        self.base.downloads += 1
+        return size
+
+    async def _supervise(self, url, fd, shift, segments, progress, workers) -> None:
+        last_progress, last_rate = 0, 0.0
+        try:
+            while True:
+                done, pending = await asyncio.wait(
+                    workers,
+                    timeout=self.adapt_interval,
+                    return_when=asyncio.FIRST_EXCEPTION,
+                )
+                for task in done:
+                    if task.exception() is not None:
+                        raise task.exception()
+                if not pending:
+                    return
+                rate = (progress[0] - last_progress) / self.adapt_interval
+                # Add a connection while each extra one still buys throughput.
+                if (
+                    len(pending) < self.max_workers
+                    and not segments.empty()
+                    and rate > last_rate * 1.1
+                ):
+                    workers = list(pending) + [
+                        asyncio.create_task(
+                            self._worker(url, fd, shift, segments, progress)
+                        )
+                    ]
+                else:
+                    workers = list(pending)
+                last_progress, last_rate = progress[0], rate
+        except BaseException:
+            for task in workers:
+                task.cancel()
+            raise
+
+    async def _worker(
+        self, url, fd, shift: int, segments: asyncio.Queue, progress
+    ) -> None:
+        while not segments.empty():
+            start, end = segments.get_nowait()
+            await self._fetch_segment(url, fd, shift, start, end, progress)
+
+    async def _fetch_segment(
+        self, url, fd, shift: int, start: int, end: int, progress
+    ) -> None:
+        offset = start
+        for attempt in range(self.retries + 1):
+            try:
+                headers = {"Range": f"bytes={offset}-{end}"}
+                async with self.base.client.stream(
+                    "GET", url, headers=headers
+                ) as response:
+                    if response.status_code == 200:
+                        raise RangeNotSupported
+                    response.raise_for_status()
+                    async for chunk in response.aiter_bytes(self.base.chunk_size):
+                        chunk = chunk[: end + 1 - offset]
+                        await run_io(os.pwrite, fd, chunk, shift + offset)
+                        offset += len(chunk)
+                        progress[0] += len(chunk)
+                        self.base.bytes_downloaded += len(chunk)
+                if offset > end:
+                    return
+            except httpx.HTTPError:
+                if attempt == self.retries:
+                    raise
+            # Resume the segment from the last byte written.
+            await asyncio.sleep(0.5 * (attempt + 1))
+        raise httpx.HTTPError(f"Segment {start}-{end} incomplete at {offset}")
+
+    @staticmethod
+    def _preallocate(file_path: str, size: int) -> None:
+        with open(file_path, "wb") as file:
+            file.truncate(size)
+
+
+segmented_downloader = SegmentedDownloader()
@@ -0,0 +1,74 @@
+# probe_video against the hachoir + moviepy path it replaced, on faststart,
+# moov-at-end and short clips. Needs the old dependencies installed:
+#
+#   pip install hachoir moviepy
+#   python -m benchmarks.media_probe [file.mp4 ...]
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List
+
+from bot.application.media_probe import probe_video
+from tests.media import make_mp4
+
+
+def legacy_probe(path: str) -> Dict:
+    from hachoir.metadata import extractMetadata
+    from hachoir.parser import createParser
+    from moviepy.video.io.VideoFileClip import VideoFileClip
+
+    metadata = extractMetadata(createParser(path))
+    try:
+        # Verbatim, including its bugs: ".second" and whole-second durations.
+        duration = datetime.strptime(
+            str(metadata.get("duration")), "%H:%M:%S.%f"
+        ).second
+    except ValueError:
+        duration = None
+    clip = VideoFileClip(path)
+    thumbnail_path = f"{path}-thumbnail.jpg"
+    clip.save_frame(thumbnail_path, t=1.00)
+    clip.close()
+    with open(thumbnail_path, "rb") as thumbnail:
+        data = thumbnail.read()
+    os.remove(thumbnail_path)
+    return dict(
+        duration=duration,
+        width=metadata.get("width"),
+        height=metadata.get("height"),
+        thumbnail=data,
+    )
+
+
+def measure(probe, path: str, runs: int) -> float:
+    started = time.perf_counter()
+    for _ in range(runs):
+        meta = probe(path)
+    elapsed = (time.perf_counter() - started) / runs
+    meta = {key: meta[key] for key in ("duration", "width", "height")}
+    print(f"  {probe.__name__:>12}: {elapsed * 1000:7.1f} ms  {meta}")
+    return elapsed
+
+
+def samples(root: str) -> List[str]:
+    return [
+        make_mp4(os.path.join(root, "faststart.mp4")),
+        make_mp4(os.path.join(root, "moov_at_end.mp4"), faststart=False),
+        make_mp4(os.path.join(root, "short.mp4"), duration=5),
+    ]
+
+
+def main() -> None:
+    runs = int(os.environ.get("BENCH_RUNS", 5))
+    with tempfile.TemporaryDirectory() as root:
+        for path in sys.argv[1:] or samples(root):
+            print(os.path.basename(path))
+            old = measure(legacy_probe, path, runs)
+            new = measure(probe_video, path, runs)
+            print(f"  {old / new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
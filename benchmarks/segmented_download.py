@@ -0,0 +1,51 @@
+# Single stream vs segmented download against a local range server that caps
+# each connection, the way media CDNs do.
+#
+#   python -m benchmarks.segmented_download
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("TEMP_DIR", tempfile.gettempdir())
+
+from backends.downloader import Downloader
+from backends.http import close_http_client
+from backends.segmented import SegmentedDownloader
+from tests.range_server import serve
+
+MB = 1024 * 1024
+
+
+async def measure(name: str, download, path: str) -> float:
+    started = time.perf_counter()
+    await download(path)
+    elapsed = time.perf_counter() - started
+    rate = os.path.getsize(path) / MB / elapsed
+    print(f"{name:>10}: {elapsed:6.2f}s  {rate:7.1f} MB/s")
+    return elapsed
+
+
+async def main() -> None:
+    size = int(os.environ.get("BENCH_SIZE_MB", 50)) * MB
+    rate = float(os.environ.get("BENCH_CONNECTION_RATE_MB", 20)) * MB
+    data = os.urandom(size)
+    base = Downloader()
+    segmented = SegmentedDownloader(base=base)
+    print(f"{size // MB} MB at {rate / MB:.0f} MB/s per connection")
+    with serve(data, rate=rate) as server, tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "blob.bin")
+        single = await measure(
+            "single", lambda path: base.download(server.url, path), path
+        )
+        split = await measure(
+            "segmented",
+            lambda path: segmented.download(server.url, path, size=size),
+            path,
+        )
+    await close_http_client()
+    print(f"{single / split:.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -6,6 +6,7 @@ from bot.application.controllers.inline_saver import InlineSaverController
 from bot.application.controllers.inline_selector import InlineSelectorController
 from bot.application.controllers.saver import SaverController
 from bot.application.controllers.simple_saver import SimpleSaverController
+from bot.application.services import Services
 
 saver_router = Router(name=__name__)
 
@@ -17,14 +18,14 @@ class HttpFilter(Filter):
 
 
 @saver_router.message(HttpFilter())
-async def link_message_handler(message: Message) -> None:
-    return await SaverController(message=message).call()
+async def link_message_handler(message: Message, services: Services) -> None:
+    return await SaverController(message=message, services=services).call()
 
 
 #
 # @saver_router.message(HttpFilter())
-# async def link_message_handler(message: Message) -> None:
-#     return await SimpleSaverController(message=message).call()
+# async def link_message_handler(message: Message, services: Services) -> None:
+#     return await SimpleSaverController(message=message, services=services).call()
 
 
 @saver_router.inline_query()
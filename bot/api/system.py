@@ -3,10 +3,11 @@ from aiogram.filters import CommandStart
 from aiogram.types import Message
 
 from bot.application.controllers.system import CommandStartController
+from bot.application.services import Services
 
 system_router = Router(name=__name__)
 
 
 @system_router.message(CommandStart())
-async def start_command_handler(message: Message) -> None:
-    return await CommandStartController(message=message).call()
+async def start_command_handler(message: Message, services: Services) -> None:
+    return await CommandStartController(message=message, services=services).call()
@@ -1,21 +1,36 @@
 import logging
+import os
 from datetime import datetime
 
 from aiogram.types import Message, InlineQuery, ChosenInlineResult
-from sqlalchemy import select, insert, update
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from bot.application.models import Account, Message as DBMessage
+from bot.application.models import Account
+from bot.application.services import Services
 from bot.exceptions import BehaviorException
-from db.session import create_session_maker
+from cache import TTLCache
+
+account_cache = TTLCache(
+    maxsize=int(os.environ.get("ACCOUNT_CACHE_SIZE", 10000)),
+    ttl=float(os.environ.get("ACCOUNT_CACHE_TTL", 300)),
+)
+# Blocking is done straight in the database, so the active flag is re-read on
+# its own short clock instead of living as long as the cached account.
+active_cache = TTLCache(
+    maxsize=int(os.environ.get("ACCOUNT_CACHE_SIZE", 10000)),
+    ttl=float(os.environ.get("ACCOUNT_ACTIVE_TTL", 30)),
+)
 
 
 class BaseController:
-    def __init__(self, message: Message):
+    def __init__(self, message: Message, services: Services):
         self.message = message
         self.user = message.from_user
         self.logger = logging.getLogger(__name__)
-        self.session = create_session_maker()
+        self.services = services
+        self.session = services.session_maker
         self.account = None
 
     async def call(self, *args, **kwargs):
@@ -32,29 +47,17 @@ class BaseController:
             )
 
     async def _write_message(self):
-        async with self.session() as session:
-            message_json = str(self.message.model_dump())
-            query = insert(DBMessage).values(
-                account_id=self.account.id,
-                message_text=self.message.text,
-                message_json=message_json,
-                created_at=datetime.now(),
-            )
-            await session.execute(query)
-            await session.commit()
+        await self.services.writer.write_message(
+            account_id=self.account.id,
+            message_text=self.message.text,
+            message_json=str(self.message.model_dump()),
+        )
 
     async def _update_last_action(self):
-        async with self.session() as session:
-            query = (
-                update(Account)
-                .where(Account.id == self.account.id)
-                .values(last_action=datetime.now())
-            )
-            await session.execute(query)
-            await session.commit()
+        await self.services.writer.touch_account(account_id=self.account.id)
 
     async def _verify_account(self):
-        if not self.account.active:
+        if not await self._is_active():
             raise BehaviorException(
                 message=dict(
                     ru="Кажется, ты кому-то насолил и тебя блокнули",
@@ -62,21 +65,28 @@ class BaseController:
                 )
             )
 
-    async def _get_or_create_account(self):
-        async with self.session() as session:
-            session: AsyncSession
-            account: Account = (
-                await session.scalars(
-                    select(Account).filter(Account.telegram_id == str(self.user.id))
-                )
-            ).first()
-        if not account:
-            return await self._create_account()
+    async def _is_active(self) -> bool:
+        active = active_cache.get(self.user.id)
+        if active is None:
+            async with self.session() as session:
+                session: AsyncSession
+                query = select(Account.active).where(Account.id == self.account.id)
+                active = bool((await session.execute(query)).scalar())
+            active_cache.set(self.user.id, active)
+        return active
+
+    async def _get_or_create_account(self) -> Account:
+        account: Account = account_cache.get(self.user.id)
+        if account is None:
+            account = await self._upsert_account()
+            account_cache.set(self.user.id, account)
+            active_cache.set(self.user.id, bool(account.active))
         return account
 
-    async def _create_account(self):
+    async def _upsert_account(self) -> Account:
         async with self.session() as session:
             session: AsyncSession
+            now = datetime.now()
             query = insert(Account).values(
                 first_name=self.user.first_name,
                 username=self.user.username,
@@ -85,20 +95,20 @@ class BaseController:
                 is_premium=self.user.is_premium,
                 active=True,
                 account_type="private",
-                created_at=datetime.now(),
-                last_action=datetime.now(),
+                created_at=now,
+                last_action=now,
             )
-            result = await session.execute(query)
+            query = query.on_conflict_do_update(
+                index_elements=[Account.telegram_id],
+                set_=dict(
+                    first_name=query.excluded.first_name,
+                    username=query.excluded.username,
+                    is_premium=query.excluded.is_premium,
+                    last_action=query.excluded.last_action,
+                ),
+            ).returning(Account)
+            account: Account = (await session.scalars(query)).one()
             await session.commit()
-            account_id: int = result.inserted_primary_key[0]
-            return await self._get_account_by_id(account_id=account_id)
-
-    async def _get_account_by_id(self, account_id: int) -> Account:
-        async with self.session() as session:
-            session: AsyncSession
-            account: Account = (
-                await session.scalars(select(Account).filter(Account.id == account_id))
-            ).first()
             return account
 
 
@@ -0,0 +1,471 @@
+import json
+import logging
+import os.path
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from io import BytesIO
+from typing import TYPE_CHECKING, Dict, Any, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.types import Message, FSInputFile, BufferedInputFile
+from aiogram.utils.chat_action import ChatActionSender
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backends import AbstractBackendResult
+from backends.async_backends import AsyncSaverBackend
+from backends.downloader import downloader
+from backends.exceptions import (
+    ObjectNotFound,
+    EntityTooLarge,
+    UnsupportedMediaType,
+    UnsupportedLinkOrigin,
+)
+from backends.executors import run_cpu
+from backends.registry import registry
+from backends.selector import AsyncBackendSelector
+from bot.application.file_cache import parse_file_info
+from bot.application.media_probe import probe_mp4, probe_video
+from bot.application.models import File
+from bot.application.services import Services
+from bot.application.streaming import StreamInputFile
+from bot.exceptions import BehaviorException
+
+if TYPE_CHECKING:
+    from yandex_music import Track
+
+
+@contextmanager
+def backend_errors():
+    try:
+        yield
+    except ObjectNotFound:
+        raise BehaviorException(
+            message=dict(en="File not found", ru="Чот я не нашел ничего 🥺")
+        )
+    except EntityTooLarge:
+        raise BehaviorException(
+            message=dict(
+                en="Entity too large", ru="Ай... Он слишком большой, семпай 👉👈"
+            )
+        )
+    except UnsupportedMediaType:
+        raise BehaviorException(
+            message=dict(en="Unsupported media type", ru="Я в картинки не могу 😓")
+        )
+    except UnsupportedLinkOrigin:
+        raise BehaviorException(
+            message=dict(
+                en="Unsupported link origin",
+                ru="Чот я не вкурил чо от меня хотят 🤬",
+            )
+        )
+
+
+class DownloadController:
+    def __init__(
+        self,
+        bot: Bot,
+        services: Services,
+        account_id: int,
+        chat_id: int,
+        language_code: str,
+        link: str,
+        status_message_id: int,
+    ):
+        self.bot = bot
+        self.services = services
+        self.session = services.session_maker
+        self.account_id = account_id
+        self.chat_id = chat_id
+        self.language_code = language_code
+        self.link = link
+        self.media_key = registry.media_key(link)
+        self.cache_key = self.media_key or link
+        self.status_message_id = status_message_id
+        self.delivered = False
+        self.size: Optional[int] = None
+        self.large: Optional[bool] = None
+        self.large_notice_sent = False
+        self.progress_updated_at = 0.0
+        self.logger = logging.getLogger(__name__)
+
+    async def call(self):
+        try:
+            if await self.respond_from_cache():
+                return
+            file_id, fmt = await self.services.flights.do(
+                self.cache_key, self._download
+            )
+            if file_id and not self.delivered:
+                await self._cached_response(file_id=file_id, fmt=fmt)
+        except BehaviorException as be:
+            default = be.message.get("ru")
+            await self.bot.send_message(
+                chat_id=self.chat_id,
+                text=be.message.get(self.language_code, default),
+            )
+
+    async def respond_from_cache(self) -> bool:
+        file_id, fmt = await self._get_file_by_link()
+        if not file_id:
+            return False
+        await self._cached_response(file_id=file_id, fmt=fmt)
+        return True
+
+    async def _download(self) -> Tuple[str, str]:
+        # Another process may have finished the same link while we waited.
+        file_id, fmt = await self._get_file_by_link()
+        if file_id:
+            return file_id, fmt
+        backend = await self._prepare_backend(link=self.link)
+        file_info = None
+        if self._can_stream(backend):
+            file_info = await self._stream_response(url=backend.stream_source())
+        if file_info is None:
+            # Everything the backend writes lives and dies with the workspace.
+            async with self.services.workspaces.workspace(size=self.size) as path:
+                backend.path = path
+                result = await self._prepare_file(backend=backend)
+                if self.large is None:
+                    self.large = await self._is_more_than_50m(file=result.file)
+                if not self.large:
+                    file_info = await self._classic_response(result=result)
+                else:
+                    file_info = await self._more_than_50mb_response(result=result)
+        if not file_info:
+            return None, None
+        self.delivered = True
+        return file_info["file_id"], file_info["format"]
+
+    async def _cached_response(self, file_id: str, fmt: str):
+        await self.bot.delete_message(
+            chat_id=self.chat_id, message_id=self.status_message_id
+        )
+        await self.bot.send_message(
+            chat_id=self.chat_id,
+            text=dict(en="Found in database.", ru="Нашов в истории")[
+                self.language_code
+            ],
+        )
+        if fmt == "mp4":
+            await self.bot.send_video(
+                chat_id=self.chat_id,
+                video=file_id,
+                caption="captured by @bsaverbot",
+            )
+        else:
+            await self.bot.send_audio(
+                chat_id=self.chat_id,
+                audio=file_id,
+                caption="captured by @bsaverbot",
+            )
+
+    async def _is_more_than_50m(self, file: str) -> bool:
+        return os.path.getsize(filename=file) / 1000 / 1000 > 50
+
+    async def _classic_response(self, result):
+        await self.bot.edit_message_text(
+            text=dict(en="Found.", ru="Нашов.")[self.language_code],
+            chat_id=self.chat_id,
+            message_id=self.status_message_id,
+        )
+        self.logger.debug(result.__dict__)
+        fmt = os.path.splitext(result.file)[1].replace(".", "")
+        file_info = dict(format=fmt)
+        if fmt == "mp3":
+            file_response: Message = await self._make_audio_response(
+                result=result,
+            )
+            json_file = file_response.model_dump()
+            file_info["file_unique_id"] = file_response.audio.file_unique_id
+            file_info["file_id"] = file_response.audio.file_id
+            file_info["file_info"] = json_file["audio"]
+        else:
+            file_response: Message = await self._make_video_response(result=result)
+            json_file = file_response.model_dump()
+            file_info["file_unique_id"] = file_response.video.file_unique_id
+            file_info["file_id"] = file_response.video.file_id
+            file_info["file_info"] = json_file["video"]
+
+        await self._create_file(file_info=file_info)
+
+        await self.bot.delete_message(
+            chat_id=self.chat_id, message_id=self.status_message_id
+        )
+        return file_info
+
+    async def _make_audio_response(self, result):
+        async with ChatActionSender.upload_voice(bot=self.bot, chat_id=self.chat_id):
+            response_file = FSInputFile(path=result.file)
+            track: "Track" = result.track
+            return await self.bot.send_audio(
+                chat_id=self.chat_id,
+                audio=response_file,
+                caption="captured by @bsaverbot",
+                duration=int(track.duration_ms / 1000),
+                performer=(
+                    str([artist["name"] for artist in track.artists])
+                    .replace("[", "")
+                    .replace("]", "")
+                    .replace("'", "")
+                ),
+                title=track.title,
+                thumbnail=(
+                    BufferedInputFile(
+                        result.cover,
+                        filename=f"{track.title}-thumb.jpg",
+                    )
+                    if result.cover
+                    else None
+                ),
+            )
+
+    async def _make_video_response(self, result):
+        async with ChatActionSender.upload_video(bot=self.bot, chat_id=self.chat_id):
+            meta: Dict = await self.generate_meta(file=result.file)
+            response_file = FSInputFile(path=result.file)
+            return await self.bot.send_video(
+                chat_id=self.chat_id,
+                video=response_file,
+                caption="captured by @bsaverbot",
+                duration=meta["duration"],
+                width=meta["width"],
+                height=meta["height"],
+                thumbnail=(
+                    BufferedInputFile(
+                        meta["thumbnail"],
+                        filename=f"{str(uuid.uuid4())}-thumb.jpg",
+                    )
+                    if meta["thumbnail"]
+                    else None
+                ),
+            )
+
+    @staticmethod
+    async def generate_meta(file: str) -> Dict:
+        return await run_cpu(probe_video, file)
+
+    async def _route(self, size: Optional[int]) -> None:
+        if size is None:
+            return
+        size_mb = size / 1000 / 1000
+        if size_mb > int(os.environ.get("MAX_FILE_SIZE", 2000)):
+            raise EntityTooLarge
+        self.large = size_mb > 50
+        # Without MTProto a large file would be refused after downloading it.
+        if self.large and self.services.uploader is None:
+            raise EntityTooLarge
+        if self.large:
+            await self._large_file_notice()
+
+    async def _large_file_notice(self) -> None:
+        if self.large_notice_sent:
+            return
+        self.large_notice_sent = True
+        await self.bot.send_message(
+            chat_id=self.chat_id,
+            text=dict(
+                en="File is large. Downloading...", ru="Файл большоевый. Скачиваю..."
+            )[self.language_code],
+        )
+
+    async def _prepare_backend(self, link: str) -> AsyncSaverBackend:
+        with backend_errors():
+            backend = AsyncSaverBackend(
+                backend=await AsyncBackendSelector(
+                    link=link, path=os.environ["TEMP_DIR"]
+                ).backend
+            )
+            # Reject or route by the expected size before fetching any bytes.
+            self.size = await backend.probe()
+            await self._route(size=self.size)
+            return backend
+
+    @staticmethod
+    async def _prepare_file(backend: AsyncSaverBackend) -> AbstractBackendResult:
+        with backend_errors():
+            result = await backend.get()
+            return result
+
+    def _can_stream(self, backend: AsyncSaverBackend) -> bool:
+        return (
+            backend.stream_source() is not None
+            and self.size is not None
+            and self.size <= int(os.environ.get("STREAM_MAX_SIZE", 20 * 1000 * 1000))
+        )
+
+    async def _stream_response(self, url: str):
+        await self.bot.edit_message_text(
+            text=dict(en="Found.", ru="Нашов.")[self.language_code],
+            chat_id=self.chat_id,
+            message_id=self.status_message_id,
+        )
+        try:
+            file_response: Message = await self._send_stream(url=url)
+        except Exception:
+            # Nothing reached the chat, so the workspace path fetches it again.
+            self.logger.exception(f"Streamed upload failed, downloading - {self.link}")
+            return None
+
+        json_file = file_response.model_dump()
+        file_info = dict(format="mp4")
+        file_info["file_unique_id"] = file_response.video.file_unique_id
+        file_info["file_id"] = file_response.video.file_id
+        file_info["file_info"] = json_file["video"]
+        await self._create_file(file_info=file_info)
+
+        await self.bot.delete_message(
+            chat_id=self.chat_id, message_id=self.status_message_id
+        )
+        return file_info
+
+    async def _send_stream(self, url: str) -> Message:
+        head_size = int(os.environ.get("STREAM_HEAD_SIZE", 2 * 1024 * 1024))
+        async with ChatActionSender.upload_video(bot=self.bot, chat_id=self.chat_id):
+            async with downloader.client.stream("GET", url) as response:
+                response.raise_for_status()
+                chunks = response.aiter_bytes(downloader.chunk_size)
+                head = b""
+                meta = None
+                async for chunk in chunks:
+                    head += chunk
+                    meta = probe_mp4(head)
+                    if meta is not None or len(head) >= head_size:
+                        break
+                # Without a leading moov atom Telegram works the metadata out itself.
+                meta = meta or {}
+                response_file = StreamInputFile(
+                    head=head, chunks=chunks, filename=f"{str(uuid.uuid4())}.mp4"
+                )
+                file_response: Message = await self.bot.send_video(
+                    chat_id=self.chat_id,
+                    video=response_file,
+                    caption="captured by @bsaverbot",
+                    duration=meta.get("duration"),
+                    width=meta.get("width"),
+                    height=meta.get("height"),
+                    supports_streaming=True,
+                )
+            downloader.bytes_downloaded += response_file.bytes_sent
+        return file_response
+
+    async def _create_file(self, file_info: Dict):
+        async with self.session() as session:
+            query = insert(File).values(
+                account_id=self.account_id,
+                link=self.link,
+                media_key=self.media_key,
+                file_id=file_info["file_id"],
+                file_info=str(file_info),
+                created_at=datetime.now(),
+            )
+            await session.execute(query)
+            await session.commit()
+        await self.services.file_cache.set(
+            self.cache_key, file_info["file_id"], file_info["format"]
+        )
+
+    async def _get_file_by_link(self) -> Tuple[str, str]:
+        cached = await self.services.file_cache.get(self.cache_key)
+        if cached is not None:
+            return cached
+        async with self.session() as session:
+            session: AsyncSession
+            if self.media_key:
+                condition = File.media_key == self.media_key
+            else:
+                condition = File.link == self.link
+            file: File = (
+                await session.scalars(select(File).filter(condition).limit(1))
+            ).first()
+            if file:
+                file_info = parse_file_info(file.file_info)
+                await self.services.file_cache.set(
+                    self.cache_key, file.file_id, file_info["format"]
+                )
+                return (file.file_id, file_info["format"])
+            return None, None
+
+    async def _upload_progress(self, current: int, total: int) -> None:
+        now = time.monotonic()
+        if current < total and now - self.progress_updated_at < 5:
+            return
+        self.progress_updated_at = now
+        await self.bot.edit_message_text(
+            text=dict(en="Uploading", ru="Загружаю")[self.language_code]
+            + f" {current * 100 // total}%",
+            chat_id=self.chat_id,
+            message_id=self.status_message_id,
+        )
+
+    async def _make_pyro_video_response(self, result: Any):
+        meta: Dict = await self.generate_meta(file=result.file)
+        return await self.services.uploader.send_video(
+            chat_id=self.chat_id,
+            video=result.file,
+            caption="captured by @bsaverbot",
+            duration=meta["duration"] or 0,
+            width=meta["width"] or 0,
+            height=meta["height"] or 0,
+            thumb=BytesIO(meta["thumbnail"]) if meta["thumbnail"] else None,
+            progress=self._upload_progress,
+        )
+
+    async def _make_pyro_audio_response(self, result: Any):
+        track: "Track" = result.track
+        return await self.services.uploader.send_audio(
+            chat_id=self.chat_id,
+            audio=result.file,
+            caption="captured by @bsaverbot",
+            duration=int(track.duration_ms / 1000),
+            performer=(
+                str([artist["name"] for artist in track.artists])
+                .replace("[", "")
+                .replace("]", "")
+                .replace("'", "")
+            ),
+            title=track.title,
+            thumb=BytesIO(result.cover) if result.cover else None,
+            progress=self._upload_progress,
+        )
+
+    async def _more_than_50mb_response(self, result):
+        if self.services.uploader is None:
+            raise BehaviorException(
+                message=dict(
+                    en="Entity too large", ru="Ай... Он слишком большой, семпай 👉👈"
+                )
+            )
+        await self._large_file_notice()
+        await self.bot.edit_message_text(
+            text=dict(en="Found.", ru="Нашов.")[self.language_code],
+            chat_id=self.chat_id,
+            message_id=self.status_message_id,
+        )
+        self.logger.debug(result.__dict__)
+        fmt = os.path.splitext(result.file)[1].replace(".", "")
+        file_info = dict(format=fmt)
+        if fmt == "mp3":
+            async with ChatActionSender.upload_voice(bot=self.bot, chat_id=self.chat_id):
+                file_response = await self._make_pyro_audio_response(result=result)
+            media = file_response.audio
+            media_key = "audio"
+        else:
+            async with ChatActionSender.upload_video(bot=self.bot, chat_id=self.chat_id):
+                file_response = await self._make_pyro_video_response(result=result)
+            media = file_response.video
+            media_key = "video"
+        json_file = json.loads(str(file_response))
+        file_info["file_unique_id"] = media.file_unique_id
+        file_info["file_id"] = media.file_id
+        file_info["file_info"] = json_file[media_key]
+
+        await self._create_file(file_info=file_info)
+
+        await self.bot.delete_message(
+            chat_id=self.chat_id, message_id=self.status_message_id
+        )
+        return file_info
@@ -11,12 +11,13 @@ from backends.exceptions import (
 )
 from backends.selector import AsyncBackendSelector
 from bot.application import BaseController
+from bot.application.services import Services
 from bot.exceptions import BehaviorException
 
 
 class SimpleSaverController(BaseController):
-    def __init__(self, message: Message):
-        super(SimpleSaverController, self).__init__(message)
+    def __init__(self, message: Message, services: Services):
+        super(SimpleSaverController, self).__init__(message, services)
 
     async def _call(self):
         self.link = self.message.text
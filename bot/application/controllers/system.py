@@ -1,11 +1,12 @@
 from aiogram.types import Message
 
 from bot.application import BaseController
+from bot.application.services import Services
 
 
 class CommandStartController(BaseController):
-    def __init__(self, message: Message):
-        super(CommandStartController, self).__init__(message)
+    def __init__(self, message: Message, services: Services):
+        super(CommandStartController, self).__init__(message, services)
 
     async def _call(self):
         await self.message.answer("Hello!")
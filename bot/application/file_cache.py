@@ -0,0 +1,132 @@
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.application.models import File
+from cache import TTLCache
+
+CachedFile = Tuple[str, str]
+
+
+def parse_file_info(file_info: str) -> Dict:
+    file_info_str = (
+        file_info.replace("'", '"').replace("True", "true").replace("False", "false")
+    )
+    return json.loads(file_info_str)
+
+
+class SharedFileCache(ABC):
+    @abstractmethod
+    async def get(self, key: str) -> Optional[CachedFile]:
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, file_id: str, fmt: str) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisFileCache(SharedFileCache):
+    def __init__(self, url: str, ttl: Optional[int] = None, prefix: str = "saver:file:"):
+        from redis import asyncio as redis
+
+        self.client = redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[CachedFile]:
+        value = await self.client.get(self.prefix + key)
+        if value is None:
+            return None
+        file_id, _, fmt = value.decode().rpartition("|")
+        return file_id, fmt
+
+    async def set(self, key: str, file_id: str, fmt: str) -> None:
+        await self.client.set(self.prefix + key, f"{file_id}|{fmt}", ex=self.ttl)
+
+    async def close(self) -> None:
+        await self.client.close()
+
+
+class FileCache:
+    def __init__(
+        self,
+        maxsize: int = int(os.environ.get("FILE_CACHE_SIZE", 50000)),
+        ttl: Optional[float] = float(os.environ.get("FILE_CACHE_TTL", 86400)),
+        shared: Optional[SharedFileCache] = None,
+    ):
+        self.local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.shared = shared
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_env(cls) -> "FileCache":
+        shared = None
+        redis_url = os.environ.get("FILE_CACHE_REDIS_URL")
+        if redis_url:
+            shared = RedisFileCache(
+                url=redis_url, ttl=int(os.environ.get("FILE_CACHE_TTL", 86400))
+            )
+        return cls(shared=shared)
+
+    async def get(self, key: str) -> Optional[CachedFile]:
+        cached: Optional[CachedFile] = self.local.get(key)
+        if cached is not None or self.shared is None:
+            return cached
+        try:
+            cached = await self.shared.get(key)
+        except Exception:
+            self.logger.exception("Shared file cache lookup failed")
+            cached = None
+        if cached is None:
+            self.shared_misses += 1
+            return None
+        self.shared_hits += 1
+        self.local.set(key, cached)
+        return cached
+
+    async def set(self, key: str, file_id: str, fmt: str) -> None:
+        self.local.set(key, (file_id, fmt))
+        if self.shared is not None:
+            try:
+                await self.shared.set(key, file_id, fmt)
+            except Exception:
+                self.logger.exception("Shared file cache update failed")
+
+    async def warm(self, session_maker: async_sessionmaker, limit: int) -> int:
+        if limit <= 0:
+            return 0
+        async with session_maker() as session:
+            session: AsyncSession
+            files = (
+                await session.scalars(
+                    select(File).order_by(File.created_at.desc()).limit(limit)
+                )
+            ).all()
+        warmed = 0
+        for file in reversed(files):
+            try:
+                fmt = parse_file_info(file.file_info)["format"]
+            except (ValueError, KeyError):
+                continue
+            self.local.set(file.media_key or file.link, (file.file_id, fmt))
+            warmed += 1
+        return warmed
+
+    def stats(self) -> Dict[str, int]:
+        stats = self.local.stats()
+        stats.update(shared_hits=self.shared_hits, shared_misses=self.shared_misses)
+        return stats
+
+    async def close(self) -> None:
+        if self.shared is not None:
+            await self.shared.close()
@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.application.models import Job
+
+
+class JobState:
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class JobQueue:
+    def __init__(
+        self,
+        session_maker: async_sessionmaker,
+        max_attempts: int = int(os.environ.get("JOB_MAX_ATTEMPTS", 3)),
+        retry_delay: float = float(os.environ.get("JOB_RETRY_DELAY", 30)),
+        lease: float = float(os.environ.get("JOB_LEASE", 1800)),
+        heartbeat_interval: Optional[float] = (
+            float(os.environ["JOB_HEARTBEAT_INTERVAL"])
+            if "JOB_HEARTBEAT_INTERVAL" in os.environ
+            else None
+        ),
+    ):
+        self.session_maker = session_maker
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.lease = lease
+        self.heartbeat_interval = heartbeat_interval or lease / 3
+        self.logger = logging.getLogger(__name__)
+
+    async def enqueue(
+        self,
+        account_id: int,
+        chat_id: int,
+        language_code: str,
+        link: str,
+        status_message_id: int,
+    ) -> int:
+        async with self.session_maker() as session:
+            now = datetime.now()
+            query = insert(Job).values(
+                account_id=account_id,
+                chat_id=chat_id,
+                language_code=language_code,
+                link=link,
+                status_message_id=status_message_id,
+                state=JobState.QUEUED,
+                attempts=0,
+                run_after=now,
+                created_at=now,
+                updated_at=now,
+            )
+            result = await session.execute(query)
+            await session.commit()
+            return result.inserted_primary_key[0]
+
+    async def claim(self) -> Optional[Job]:
+        async with self.session_maker() as session:
+            session: AsyncSession
+            # SKIP LOCKED already isolates workers; SERIALIZABLE would only add
+            # serialization failures between concurrent claims.
+            await session.connection(
+                execution_options=dict(isolation_level="READ COMMITTED")
+            )
+            now = datetime.now()
+            expired = and_(
+                Job.state == JobState.RUNNING,
+                Job.updated_at < now - timedelta(seconds=self.lease),
+            )
+            # A job whose worker kept dying has used up its attempts too.
+            await session.execute(
+                update(Job)
+                .where(expired, Job.attempts >= self.max_attempts)
+                .values(
+                    state=JobState.FAILED, last_error="Lease expired", updated_at=now
+                )
+            )
+            query = (
+                select(Job)
+                .where(
+                    or_(
+                        and_(Job.state == JobState.QUEUED, Job.run_after <= now),
+                        and_(expired, Job.attempts < self.max_attempts),
+                    )
+                )
+                .order_by(Job.run_after)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            job: Job = (await session.scalars(query)).first()
+            if job is None:
+                return None
+            job.state = JobState.RUNNING
+            job.attempts += 1
+            job.updated_at = now
+            await session.commit()
+            return job
+
+    async def touch(self, job: Job) -> None:
+        async with self.session_maker() as session:
+            query = (
+                update(Job)
+                .where(Job.id == job.id, Job.state == JobState.RUNNING)
+                .values(updated_at=datetime.now())
+            )
+            await session.execute(query)
+            await session.commit()
+
+    async def heartbeat(self, job: Job) -> None:
+        # Keeps the lease fresh while the job runs so it is not reclaimed.
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self.touch(job)
+            except Exception:
+                self.logger.exception(f"Job {job.id} heartbeat failed")
+
+    async def complete(self, job: Job) -> None:
+        await self._set_state(job, state=JobState.DONE)
+
+    async def fail(self, job: Job, error: str) -> bool:
+        if job.attempts >= self.max_attempts:
+            await self._set_state(job, state=JobState.FAILED, last_error=error)
+            return False
+        await self._set_state(
+            job,
+            state=JobState.QUEUED,
+            last_error=error,
+            run_after=datetime.now()
+            + timedelta(seconds=self.retry_delay * job.attempts),
+        )
+        return True
+
+    async def _set_state(self, job: Job, state: str, **values) -> None:
+        async with self.session_maker() as session:
+            query = (
+                update(Job)
+                .where(Job.id == job.id)
+                .values(state=state, updated_at=datetime.now(), **values)
+            )
+            await session.execute(query)
+            await session.commit()
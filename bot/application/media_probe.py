@@ -0,0 +1,151 @@
+import os
+import struct
+import subprocess
+from typing import Dict, Iterator, Optional, Tuple
+
+
+Box = Tuple[bytes, int, int]
+
+
+def _boxes(data: bytes, start: int, end: int) -> Iterator[Box]:
+    offset = start
+    while offset + 8 <= end:
+        size, kind = struct.unpack(">I4s", data[offset : offset + 8])
+        header = 8
+        if size == 1:
+            if offset + 16 > end:
+                return
+            size = struct.unpack(">Q", data[offset + 8 : offset + 16])[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header:
+            return
+        yield kind, offset + header, offset + size
+        offset += size
+
+
+def _child(data: bytes, start: int, end: int, kind: bytes) -> Optional[Box]:
+    for box in _boxes(data, start, end):
+        if box[0] == kind:
+            return box
+    return None
+
+
+def _duration(data: bytes, start: int) -> Optional[float]:
+    version = data[start]
+    if version == 1:
+        timescale, duration = struct.unpack(">IQ", data[start + 20 : start + 32])
+    else:
+        timescale, duration = struct.unpack(">II", data[start + 12 : start + 20])
+    if not timescale:
+        return None
+    return duration / timescale
+
+
+def _dimensions(data: bytes, start: int) -> Tuple[int, int]:
+    offset = start + (88 if data[start] == 1 else 76)
+    width, height = struct.unpack(">II", data[offset : offset + 8])
+    return width >> 16, height >> 16
+
+
+def _is_video_track(data: bytes, start: int, end: int) -> bool:
+    mdia = _child(data, start, end, b"mdia")
+    if mdia is None:
+        return False
+    hdlr = _child(data, mdia[1], mdia[2], b"hdlr")
+    return hdlr is not None and data[hdlr[1] + 8 : hdlr[1] + 12] == b"vide"
+
+
+def probe_mp4(data: bytes) -> Optional[Dict]:
+    # None until the whole moov atom is inside data.
+    moov = None
+    for kind, start, end in _boxes(data, 0, len(data)):
+        if kind == b"moov":
+            moov = (start, end)
+            break
+    if moov is None or moov[1] > len(data):
+        return None
+
+    start, end = moov
+    mvhd = _child(data, start, end, b"mvhd")
+    duration = _duration(data, mvhd[1]) if mvhd else None
+    width = height = None
+    for kind, trak_start, trak_end in _boxes(data, start, end):
+        if kind != b"trak" or not _is_video_track(data, trak_start, trak_end):
+            continue
+        tkhd = _child(data, trak_start, trak_end, b"tkhd")
+        if tkhd is not None:
+            width, height = _dimensions(data, tkhd[1])
+            break
+    return dict(
+        duration=int(round(duration)) if duration is not None else None,
+        width=width,
+        height=height,
+    )
+
+
+def read_moov(path: str) -> Optional[bytes]:
+    with open(path, "rb") as file:
+        file_size = os.fstat(file.fileno()).st_size
+        offset = 0
+        while offset + 8 <= file_size:
+            file.seek(offset)
+            header = file.read(16)
+            size, kind = struct.unpack(">I4s", header[:8])
+            header_size = 8
+            if size == 1:
+                size = struct.unpack(">Q", header[8:16])[0]
+                header_size = 16
+            elif size == 0:
+                size = file_size - offset
+            if size < header_size:
+                return None
+            if kind == b"moov":
+                file.seek(offset)
+                return file.read(size)
+            offset += size
+    return None
+
+
+def extract_thumbnail(path: str, at: float = 1.0) -> Optional[bytes]:
+    from imageio_ffmpeg import get_ffmpeg_exe
+
+    # Seek before the input and decode key frames only: one cheap frame.
+    result = subprocess.run(
+        [
+            get_ffmpeg_exe(),
+            "-loglevel",
+            "error",
+            "-ss",
+            f"{at:.3f}",
+            "-skip_frame",
+            "nokey",
+            "-i",
+            path,
+            "-frames:v",
+            "1",
+            "-vf",
+            "scale=320:320:force_original_aspect_ratio=decrease",
+            "-f",
+            "image2pipe",
+            "-vcodec",
+            "mjpeg",
+            "-",
+        ],
+        capture_output=True,
+        timeout=int(os.environ.get("THUMBNAIL_TIMEOUT", 30)),
+    )
+    return result.stdout or None
+
+
+def probe_video(path: str) -> Dict:
+    moov = read_moov(path)
+    meta = (probe_mp4(moov) if moov else None) or dict(
+        duration=None, width=None, height=None
+    )
+    duration = meta["duration"]
+    meta["thumbnail"] = extract_thumbnail(
+        path, at=min(1.0, duration / 2) if duration else 0.0
+    )
+    return meta
@@ -31,6 +31,23 @@ class File:
     id: int
     account_id: int
     link: str
+    media_key: str
     file_id: str
     file_info: str
     created_at: str
+
+
+@dataclass
+class Job:
+    id: int
+    account_id: int
+    chat_id: int
+    language_code: str
+    link: str
+    status_message_id: int
+    state: str
+    attempts: int
+    last_error: str
+    run_after: datetime
+    created_at: datetime
+    updated_at: datetime
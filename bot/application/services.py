@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import os
+import sys
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from backends import executors
+from backends.browser_pool import browser_pool
+from backends.downloader import downloader
+from backends.http import close_http_client
+from bot.application.file_cache import FileCache
+from bot.application.jobs import JobQueue
+from bot.application.singleflight import SingleFlight
+from bot.application.uploader import MTProtoUploader
+from bot.application.workspaces import WorkspaceManager
+from bot.application.writer import WriteBehindWriter
+from db.session import create_session_maker, dispose_engine
+
+
+class Services:
+    def __init__(
+        self,
+        session_maker: async_sessionmaker,
+        writer: WriteBehindWriter,
+        file_cache: FileCache,
+        flights: SingleFlight,
+        jobs: JobQueue,
+        workspaces: WorkspaceManager,
+        uploader: Optional[MTProtoUploader] = None,
+        queue_downloads: bool = False,
+    ):
+        self.session_maker = session_maker
+        self.writer = writer
+        self.file_cache = file_cache
+        self.flights = flights
+        self.jobs = jobs
+        self.workspaces = workspaces
+        self.uploader = uploader
+        self.queue_downloads = queue_downloads
+        self.logger = logging.getLogger(__name__)
+        self._warmup: Optional[asyncio.Task] = None
+
+    @classmethod
+    def create(cls) -> "Services":
+        session_maker = create_session_maker()
+        return cls(
+            session_maker=session_maker,
+            writer=WriteBehindWriter(session_maker=session_maker),
+            file_cache=FileCache.from_env(),
+            flights=SingleFlight(),
+            jobs=JobQueue(session_maker=session_maker),
+            workspaces=WorkspaceManager(),
+            uploader=MTProtoUploader.from_env(),
+            queue_downloads=os.environ.get("DOWNLOAD_MODE", "inline") == "queue",
+        )
+
+    async def start(self, downloads: bool = True) -> None:
+        await self.writer.start()
+        if downloads:
+            # Warm backends behind polling so a restart starts serving cache
+            # hits right away instead of waiting for Chrome and MTProto.
+            self._warmup = asyncio.create_task(self._start_backends())
+        warmed = await self.file_cache.warm(
+            session_maker=self.session_maker,
+            limit=int(os.environ.get("FILE_CACHE_WARM_SIZE", 1000)),
+        )
+        self.logger.info(f"File cache warmed with {warmed} entries")
+
+    async def _start_backends(self) -> None:
+        from backends.async_backends.yandex_music import get_client
+
+        await self.workspaces.start()
+        try:
+            await get_client()
+        except Exception:
+            self.logger.exception("Yandex Music client init failed, retrying lazily")
+        try:
+            await browser_pool.start()
+        except Exception:
+            self.logger.exception("Browser pool start failed, retrying lazily")
+        if self.uploader is not None:
+            try:
+                await self.uploader.start()
+            except Exception:
+                self.logger.exception("MTProto uploader start failed, retrying lazily")
+
+    async def stop(self) -> None:
+        self.logger.info(f"File cache stats: {self.file_cache.stats()}")
+        self.logger.info(f"Downloader stats: {downloader.stats()}")
+        yandex_music = sys.modules.get("backends.async_backends.yandex_music")
+        if yandex_music is not None:
+            self.logger.info(f"Yandex Music cache stats: {yandex_music.cache_stats()}")
+        self.logger.info(f"Workspace stats: {self.workspaces.stats()}")
+        if self._warmup is not None and not self._warmup.done():
+            self._warmup.cancel()
+            try:
+                await self._warmup
+            except asyncio.CancelledError:
+                pass
+        await self.writer.stop()
+        await self.workspaces.stop()
+        await self.file_cache.close()
+        await browser_pool.stop()
+        if self.uploader is not None:
+            await self.uploader.stop()
+        await close_http_client()
+        executors.shutdown()
+        await dispose_engine()
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from db.session import create_lock_engine
+
+
+class SingleFlight:
+    def __init__(
+        self,
+        advisory_locks: bool = os.environ.get("SINGLE_FLIGHT_ADVISORY_LOCKS", "")
+        .strip()
+        .lower()
+        in ("1", "true", "yes", "on"),
+        # Concurrent lock attempts per process, and the lock pool's idle size.
+        max_leaders: int = int(
+            os.environ.get(
+                "SINGLE_FLIGHT_MAX_LEADERS",
+                max(1, int(os.environ.get("DB_POOL_SIZE", 10)) // 2),
+            )
+        ),
+        lock_timeout: float = float(os.environ.get("SINGLE_FLIGHT_LOCK_TIMEOUT", 120)),
+        poll_interval: float = float(
+            os.environ.get("SINGLE_FLIGHT_POLL_INTERVAL", 0.5)
+        ),
+    ):
+        self.advisory_locks = advisory_locks
+        self.max_leaders = max_leaders
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self.logger = logging.getLogger(__name__)
+        self._flights: Dict[str, asyncio.Future] = {}
+        self._leaders: Optional[asyncio.Semaphore] = None
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._flights.get(key)
+        if flight is not None:
+            return await asyncio.shield(flight)
+
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[key] = flight
+        try:
+            async with self._lock(key):
+                result = await fn()
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except BaseException as e:
+            flight.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting.
+            flight.exception()
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            del self._flights[key]
+
+    @property
+    def leaders(self) -> asyncio.Semaphore:
+        if self._leaders is None:
+            self._leaders = asyncio.Semaphore(self.max_leaders)
+        return self._leaders
+
+    @asynccontextmanager
+    async def _lock(self, key: str):
+        if not self.advisory_locks:
+            yield
+            return
+        connection = await self._acquire(key)
+        try:
+            yield
+        finally:
+            if connection is not None:
+                await self._release(connection, key)
+
+    async def _acquire(self, key: str) -> Optional[AsyncConnection]:
+        # pg_advisory_lock cannot time out, so poll the non-blocking variant.
+        deadline = asyncio.get_running_loop().time() + self.lock_timeout
+        while True:
+            connection = await self._try_lock(key)
+            if connection is not None:
+                return connection
+            if asyncio.get_running_loop().time() >= deadline:
+                # Doing the work twice beats failing the request.
+                self.logger.warning(f"Advisory lock for {key} timed out, going ahead")
+                return None
+            await asyncio.sleep(self.poll_interval)
+
+    async def _try_lock(self, key: str) -> Optional[AsyncConnection]:
+        # A slot covers one attempt only, so waiting on a busy key between
+        # attempts holds neither a slot nor a connection.
+        async with self.leaders:
+            connection = await create_lock_engine(self.max_leaders).connect()
+            try:
+                locked = await connection.scalar(
+                    text("SELECT pg_try_advisory_lock(hashtext(:key))"), dict(key=key)
+                )
+            except BaseException:
+                await connection.close()
+                raise
+            if not locked:
+                await connection.close()
+                return None
+            return connection
+
+    @staticmethod
+    async def _release(connection: AsyncConnection, key: str) -> None:
+        try:
+            await connection.execute(
+                text("SELECT pg_advisory_unlock(hashtext(:key))"), dict(key=key)
+            )
+        except BaseException:
+            # Never hand a connection that may still hold the lock back to
+            # the pool; dropping it releases the lock server-side.
+            await connection.invalidate()
+            raise
+        finally:
+            await connection.close()
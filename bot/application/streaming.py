@@ -0,0 +1,25 @@
+from typing import AsyncGenerator, AsyncIterator
+
+from aiogram import Bot
+from aiogram.types import InputFile
+
+
+class StreamInputFile(InputFile):
+    def __init__(
+        self,
+        head: bytes,
+        chunks: AsyncIterator[bytes],
+        filename: str,
+    ):
+        super(StreamInputFile, self).__init__(filename=filename)
+        self.head = head
+        self.chunks = chunks
+        self.bytes_sent = 0
+
+    async def read(self, bot: Bot) -> AsyncGenerator[bytes, None]:
+        if self.head:
+            self.bytes_sent += len(self.head)
+            yield self.head
+        async for chunk in self.chunks:
+            self.bytes_sent += len(chunk)
+            yield chunk
@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import os
+from typing import TYPE_CHECKING, Any, Optional
+
+if TYPE_CHECKING:
+    from pyrogram import Client
+    from pyrogram.types import Message
+
+
+class MTProtoUploader:
+    def __init__(
+        self,
+        api_id: str,
+        api_hash: str,
+        bot_token: str,
+        max_concurrent_uploads: int = int(
+            os.environ.get("MTPROTO_MAX_CONCURRENT_UPLOADS", 4)
+        ),
+        max_transmissions: int = int(os.environ.get("MTPROTO_MAX_TRANSMISSIONS", 4)),
+        max_flood_waits: int = int(os.environ.get("MTPROTO_MAX_FLOOD_WAITS", 3)),
+    ):
+        self.api_id = api_id
+        self.api_hash = api_hash
+        self.bot_token = bot_token
+        self.max_transmissions = max_transmissions
+        self.client: Optional["Client"] = None
+        self.max_concurrent_uploads = max_concurrent_uploads
+        self.max_flood_waits = max_flood_waits
+        self.logger = logging.getLogger(__name__)
+        self._uploads: Optional[asyncio.Semaphore] = None
+        self._started = False
+        self._start_lock: Optional[asyncio.Lock] = None
+
+    @classmethod
+    def from_env(cls) -> Optional["MTProtoUploader"]:
+        if not os.environ.get("TELEGRAM_API_ID"):
+            return None
+        return cls(
+            api_id=os.environ["TELEGRAM_API_ID"],
+            api_hash=os.environ["TELEGRAM_API_HASH"],
+            bot_token=os.environ["TELEGRAM_TOKEN"],
+        )
+
+    async def start(self) -> None:
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if not self._started:
+                await self._start()
+
+    async def _start(self) -> None:
+        # pyrogram is heavy to import; only pay for it once uploads are needed.
+        from pyrogram import Client
+
+        # Logging in with the bot token makes uploaded file ids valid for the
+        # Bot API, so files can go straight to the user's chat.
+        self.client = Client(
+            "bsaverbot-uploader",
+            api_id=self.api_id,
+            api_hash=self.api_hash,
+            bot_token=self.bot_token,
+            in_memory=True,
+            no_updates=True,
+            max_concurrent_transmissions=self.max_transmissions,
+        )
+        self._uploads = asyncio.Semaphore(self.max_concurrent_uploads)
+        await self.client.start()
+        self._started = True
+        self.logger.info("MTProto uploader started")
+
+    async def stop(self) -> None:
+        if self._started:
+            await self.client.stop()
+            self._started = False
+
+    async def send_video(self, chat_id: int, video: str, **kwargs) -> "Message":
+        return await self._send("send_video", chat_id=chat_id, video=video, **kwargs)
+
+    async def send_audio(self, chat_id: int, audio: str, **kwargs) -> "Message":
+        return await self._send("send_audio", chat_id=chat_id, audio=audio, **kwargs)
+
+    async def _send(self, method: str, **kwargs: Any) -> "Message":
+        from pyrogram.errors import FloodWait
+
+        await self.start()
+        async with self._uploads:
+            for attempt in range(self.max_flood_waits + 1):
+                try:
+                    return await getattr(self.client, method)(**kwargs)
+                except FloodWait as e:
+                    if attempt == self.max_flood_waits:
+                        raise
+                    self.logger.warning(f"Flood wait for {e.value}s on upload")
+                    await asyncio.sleep(e.value)
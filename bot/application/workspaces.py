@@ -0,0 +1,232 @@
+import asyncio
+import fnmatch
+import logging
+import os
+import shutil
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Iterable, Optional, Set
+
+from backends.executors import run_io
+from bot.exceptions import BehaviorException
+
+MB = 1000 * 1000
+WORKSPACE_PREFIX = "job-"
+
+
+def available_memory() -> int:
+    try:
+        with open("/proc/meminfo") as meminfo:
+            for line in meminfo:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+
+
+def last_modified(path: str) -> float:
+    # A workspace is alive while anything inside it is still being written.
+    latest = os.lstat(path).st_mtime
+    if os.path.isdir(path) and not os.path.islink(path):
+        for root, dirs, files in os.walk(path):
+            for name in dirs + files:
+                try:
+                    latest = max(latest, os.lstat(os.path.join(root, name)).st_mtime)
+                except FileNotFoundError:
+                    continue
+    return latest
+
+
+def remove(path: str) -> None:
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class WorkspaceManager:
+    def __init__(
+        self,
+        root: str = os.environ.get("TEMP_DIR", "/tmp"),
+        # The budget is per process: every bot, worker and supervisor child
+        # gets its own, so size it as the disk share of one process.
+        budget: int = int(os.environ.get("TEMP_DIR_BUDGET", 10000)) * MB,
+        wait_timeout: float = float(os.environ.get("TEMP_DIR_WAIT_TIMEOUT", 60)),
+        unknown_size: int = int(os.environ.get("TEMP_DIR_UNKNOWN_SIZE", 50)) * MB,
+        sweep_interval: float = float(os.environ.get("TEMP_SWEEP_INTERVAL", 600)),
+        orphan_age: float = float(os.environ.get("TEMP_ORPHAN_AGE", 3600)),
+        # The root may be shared (it defaults to /tmp), so only entries we
+        # name ourselves are swept; add legacy patterns here explicitly.
+        sweep_patterns: Iterable[str] = os.environ.get(
+            "TEMP_SWEEP_PATTERNS", f"{WORKSPACE_PREFIX}*"
+        ).split(","),
+        tmpfs_root: Optional[str] = os.environ.get("TEMP_TMPFS_DIR") or None,
+        tmpfs_max_size: int = int(os.environ.get("TEMP_TMPFS_MAX_SIZE", 100)) * MB,
+        tmpfs_min_free: int = int(os.environ.get("TEMP_TMPFS_MIN_FREE", 1024)) * MB,
+    ):
+        self.root = root
+        self.budget = budget
+        self.wait_timeout = wait_timeout
+        self.unknown_size = unknown_size
+        self.sweep_interval = sweep_interval
+        self.orphan_age = orphan_age
+        self.sweep_patterns = [
+            pattern.strip() for pattern in sweep_patterns if pattern.strip()
+        ]
+        self.tmpfs_root = tmpfs_root
+        self.tmpfs_max_size = tmpfs_max_size
+        self.tmpfs_min_free = tmpfs_min_free
+        self.reserved = 0
+        self.swept = 0
+        self.logger = logging.getLogger(__name__)
+        self._active: Set[str] = set()
+        self._condition: Optional[asyncio.Condition] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        await self.sweep()
+        if self._task is None and self.sweep_interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    @asynccontextmanager
+    async def workspace(self, size: Optional[int] = None) -> AsyncIterator[str]:
+        reservation = size if size is not None else self.unknown_size
+        await self._reserve(reservation)
+        try:
+            path = await run_io(self._create, size)
+        except BaseException:
+            await self._release(reservation)
+            raise
+        self._active.add(path)
+        try:
+            yield path
+        finally:
+            self._active.discard(path)
+            await run_io(remove, path)
+            await self._release(reservation)
+
+    async def sweep(self) -> int:
+        swept = await run_io(self._sweep, set(self._active))
+        if swept:
+            self.logger.info(f"Swept {swept} orphaned temp entries")
+        self.swept += swept
+        return swept
+
+    def stats(self) -> Dict[str, int]:
+        return dict(
+            active=len(self._active),
+            reserved=self.reserved,
+            budget=self.budget,
+            swept=self.swept,
+        )
+
+    @property
+    def condition(self) -> asyncio.Condition:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def _reserve(self, size: int) -> None:
+        if self.budget > 0 and size > self.budget:
+            raise self._busy()
+        async with self.condition:
+            if not self._fits_budget(size):
+                try:
+                    await asyncio.wait_for(
+                        self.condition.wait_for(lambda: self._fits_budget(size)),
+                        timeout=self.wait_timeout,
+                    )
+                except asyncio.TimeoutError:
+                    raise self._busy()
+            self.reserved += size
+        # The budget only covers our own files; the disk may be shared.
+        if await run_io(self._free_space, self.root) < size:
+            await self._release(size)
+            raise self._busy()
+
+    def _fits_budget(self, size: int) -> bool:
+        return self.budget <= 0 or self.reserved + size <= self.budget
+
+    async def _release(self, size: int) -> None:
+        async with self.condition:
+            self.reserved -= size
+            self.condition.notify_all()
+
+    def _create(self, size: Optional[int]) -> str:
+        root = self.root
+        if self._fits_in_memory(size):
+            root = self.tmpfs_root
+        path = os.path.join(root, f"{WORKSPACE_PREFIX}{uuid.uuid4().hex}")
+        os.makedirs(path)
+        return path
+
+    def _fits_in_memory(self, size: Optional[int]) -> bool:
+        if self.tmpfs_root is None or size is None or size > self.tmpfs_max_size:
+            return False
+        try:
+            free = self._free_space(self.tmpfs_root)
+        except OSError:
+            return False
+        return free >= size and available_memory() - size >= self.tmpfs_min_free
+
+    def _sweep(self, active: Set[str]) -> int:
+        swept = 0
+        deadline = time.time() - self.orphan_age
+        for root in filter(None, (self.root, self.tmpfs_root)):
+            try:
+                entries = list(os.scandir(root))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                if entry.path in active or not self._sweepable(entry.name):
+                    continue
+                try:
+                    if last_modified(entry.path) > deadline:
+                        continue
+                except FileNotFoundError:
+                    continue
+                remove(entry.path)
+                swept += 1
+        return swept
+
+    def _sweepable(self, name: str) -> bool:
+        return any(
+            fnmatch.fnmatchcase(name, pattern) for pattern in self.sweep_patterns
+        )
+
+    @staticmethod
+    def _free_space(root: str) -> int:
+        os.makedirs(root, exist_ok=True)
+        return shutil.disk_usage(root).free
+
+    @staticmethod
+    def _busy() -> BehaviorException:
+        return BehaviorException(
+            message=dict(
+                en="Too many downloads right now, try again later",
+                ru="Я сейчас весь забит, попробуй попозже 🥵",
+            )
+        )
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await self.sweep()
+            except Exception:
+                self.logger.exception("Temp dir sweep failed")
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from bot.application.models import Account, Message as DBMessage
+
+_STOP = object()
+
+
+class WriteBehindWriter:
+    def __init__(
+        self,
+        session_maker: async_sessionmaker,
+        batch_size: int = int(os.environ.get("WRITER_BATCH_SIZE", 200)),
+        flush_interval: float = float(os.environ.get("WRITER_FLUSH_INTERVAL_MS", 500))
+        / 1000,
+        max_queue_size: int = int(os.environ.get("WRITER_MAX_QUEUE_SIZE", 10000)),
+    ):
+        self.session_maker = session_maker
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.logger = logging.getLogger(__name__)
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    async def write_message(
+        self, account_id: int, message_text: str, message_json: str
+    ) -> None:
+        await self._queue.put(
+            (
+                "message",
+                dict(
+                    account_id=account_id,
+                    message_text=message_text,
+                    message_json=message_json,
+                    created_at=datetime.now(),
+                ),
+            )
+        )
+
+    async def touch_account(self, account_id: int) -> None:
+        await self._queue.put(("last_action", (account_id, datetime.now())))
+
+    @property
+    def queue_size(self) -> int:
+        return self._queue.qsize()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        messages: List[Dict] = []
+        last_actions: Dict[int, datetime] = {}
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(deadline - loop.time(), 0)
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                item = None
+
+            if item is _STOP:
+                await self._flush(messages, last_actions)
+                return
+
+            if item is not None:
+                kind, payload = item
+                if kind == "message":
+                    messages.append(payload)
+                else:
+                    account_id, last_action = payload
+                    last_actions[account_id] = last_action
+                if deadline is None:
+                    deadline = loop.time() + self.flush_interval
+
+            pending = len(messages) + len(last_actions)
+            if pending and (
+                pending >= self.batch_size or loop.time() >= deadline
+            ):
+                await self._flush(messages, last_actions)
+                messages, last_actions = [], {}
+                deadline = None
+
+    async def _flush(
+        self, messages: List[Dict], last_actions: Dict[int, datetime]
+    ) -> None:
+        if not messages and not last_actions:
+            return
+        try:
+            async with self.session_maker() as session:
+                if messages:
+                    await session.execute(insert(DBMessage), messages)
+                if last_actions:
+                    await session.execute(
+                        update(Account),
+                        [
+                            dict(id=account_id, last_action=last_action)
+                            for account_id, last_action in last_actions.items()
+                        ],
+                    )
+                await session.commit()
+        except Exception:
+            self.logger.exception(
+                f"Failed to flush {len(messages)} messages "
+                f"and {len(last_actions)} last actions"
+            )
@@ -0,0 +1,57 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class TTLCache:
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._expires: Dict[Hashable, float] = {}
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        if key not in self._data:
+            self.misses += 1
+            return default
+        expires = self._expires.get(key)
+        if expires is not None and expires < time.monotonic():
+            self.pop(key)
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return self._data[key]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if ttl is not None:
+            self._expires[key] = time.monotonic() + ttl
+        else:
+            self._expires.pop(key, None)
+        while len(self._data) > self.maxsize:
+            oldest, _ = self._data.popitem(last=False)
+            self._expires.pop(oldest, None)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        self._expires.pop(key, None)
+        return self._data.pop(key, default)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._expires.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return dict(size=len(self._data), hits=self.hits, misses=self.misses)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
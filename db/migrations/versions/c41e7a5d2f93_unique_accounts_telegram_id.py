@@ -0,0 +1,58 @@
+"""Unique index on accounts.telegram_id
+
+Revision ID: c41e7a5d2f93
+Revises: ba71bdb01fa0
+Create Date: 2026-10-18 10:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41e7a5d2f93'
+down_revision: Union[str, None] = 'ba71bdb01fa0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Collapse duplicated accounts onto the oldest row before adding the index.
+    op.execute(
+        """
+        WITH duplicates AS (
+            SELECT id, MIN(id) OVER (PARTITION BY telegram_id) AS keep_id
+            FROM accounts
+            WHERE telegram_id IS NOT NULL
+        )
+        UPDATE messages SET account_id = duplicates.keep_id
+        FROM duplicates
+        WHERE messages.account_id = duplicates.id AND duplicates.id <> duplicates.keep_id
+        """
+    )
+    op.execute(
+        """
+        WITH duplicates AS (
+            SELECT id, MIN(id) OVER (PARTITION BY telegram_id) AS keep_id
+            FROM accounts
+            WHERE telegram_id IS NOT NULL
+        )
+        UPDATE files SET account_id = duplicates.keep_id
+        FROM duplicates
+        WHERE files.account_id = duplicates.id AND duplicates.id <> duplicates.keep_id
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM accounts
+        USING accounts AS keep
+        WHERE accounts.telegram_id = keep.telegram_id AND accounts.id > keep.id
+        """
+    )
+    op.create_index('ix_accounts_telegram_id', 'accounts', ['telegram_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_accounts_telegram_id', table_name='accounts')
@@ -0,0 +1,110 @@
+"""Added files media_key
+
+Revision ID: e8b2d64f0a17
+Revises: c41e7a5d2f93
+Create Date: 2026-10-18 11:02:17.540931
+
+"""
+import re
+from typing import Optional, Sequence, Union
+from urllib.parse import parse_qs, urlparse
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b2d64f0a17'
+down_revision: Union[str, None] = 'c41e7a5d2f93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The key rules are frozen here as they were at this revision, so later
+# changes to backends/keys.py cannot change what this backfill writes.
+_YOUTUBE_ID = re.compile(r"^[A-Za-z0-9_-]{11}$")
+_INSTAGRAM_MEDIA_PATHS = ("p", "reel", "reels", "tv")
+
+
+def _youtube_key(url, parts) -> Optional[str]:
+    video_id = None
+    if url.hostname.endswith("youtu.be"):
+        video_id = parts[0] if parts else None
+    elif parts and parts[0] == "watch":
+        video_id = parse_qs(url.query).get("v", [None])[0]
+    elif len(parts) > 1 and parts[0] in ("shorts", "embed", "live", "v"):
+        video_id = parts[1]
+    if video_id and _YOUTUBE_ID.match(video_id):
+        return f"youtube:{video_id}"
+    return None
+
+
+def _yandex_music_key(url, parts) -> Optional[str]:
+    if "track" in parts:
+        index = parts.index("track")
+        if index + 1 < len(parts) and parts[index + 1].isdigit():
+            return f"yandex_music:{parts[index + 1]}"
+    return None
+
+
+def _instagram_key(url, parts) -> Optional[str]:
+    for index, part in enumerate(parts[:-1]):
+        if part in _INSTAGRAM_MEDIA_PATHS:
+            return f"instagram:{parts[index + 1]}"
+    return None
+
+
+_KEYS = {
+    "youtube.com": _youtube_key,
+    "youtu.be": _youtube_key,
+    "music.yandex.ru": _yandex_music_key,
+    "music.yandex.com": _yandex_music_key,
+    "music.yandex.by": _yandex_music_key,
+    "music.yandex.kz": _yandex_music_key,
+    "instagram.com": _instagram_key,
+}
+
+
+def media_key(link: str) -> Optional[str]:
+    try:
+        url = urlparse(link.strip())
+    except ValueError:
+        return None
+    parts = [part for part in url.path.split("/") if part]
+    host = (url.hostname or "").lower()
+    while host:
+        key_builder = _KEYS.get(host)
+        if key_builder:
+            return key_builder(url, parts)
+        host = host.partition(".")[2]
+    return None
+
+
+def upgrade() -> None:
+    op.add_column('files', sa.Column('media_key', sa.String(), nullable=True))
+
+    connection = op.get_bind()
+    files = sa.table(
+        'files',
+        sa.column('id', sa.Integer),
+        sa.column('link', sa.String),
+        sa.column('media_key', sa.String),
+    )
+    updates = []
+    for row in connection.execute(sa.select(files.c.id, files.c.link)):
+        key = media_key(row.link) if row.link else None
+        if key:
+            updates.append(dict(file_id=row.id, media_key=key))
+    if updates:
+        connection.execute(
+            files.update()
+            .where(files.c.id == sa.bindparam('file_id'))
+            .values(media_key=sa.bindparam('media_key')),
+            updates,
+        )
+
+    op.create_index('ix_files_media_key', 'files', ['media_key'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_files_media_key', table_name='files')
+    op.drop_column('files', 'media_key')
@@ -1,5 +1,6 @@
 from sqlalchemy import (
     Integer,
+    BigInteger,
     String,
     Column,
     MetaData,
@@ -8,10 +9,11 @@ from sqlalchemy import (
     DateTime,
     ForeignKey,
     JSON,
+    Index,
 )
 from sqlalchemy.orm import registry
 
-from bot.application.models import Account, Message, File
+from bot.application.models import Account, Message, File, Job
 
 metadata_obj = MetaData()
 mapper_registry = registry()
@@ -29,6 +31,7 @@ accounts = Table(
     Column("account_type", String()),
     Column("created_at", DateTime()),
     Column("last_action", DateTime()),
+    Index("ix_accounts_telegram_id", "telegram_id", unique=True),
 )
 
 messages = Table(
@@ -47,11 +50,32 @@ files = Table(
     Column("id", Integer, primary_key=True),
     Column("account_id", Integer, ForeignKey("accounts.id"), nullable=False),
     Column("link", String()),
+    Column("media_key", String()),
     Column("file_id", String()),
     Column("file_info", String()),
     Column("created_at", DateTime()),
+    Index("ix_files_media_key", "media_key"),
+)
+
+jobs = Table(
+    "jobs",
+    metadata_obj,
+    Column("id", Integer, primary_key=True),
+    Column("account_id", Integer, ForeignKey("accounts.id"), nullable=False),
+    Column("chat_id", BigInteger(), nullable=False),
+    Column("language_code", String()),
+    Column("link", String(), nullable=False),
+    Column("status_message_id", BigInteger()),
+    Column("state", String(), nullable=False),
+    Column("attempts", Integer(), nullable=False, default=0),
+    Column("last_error", String()),
+    Column("run_after", DateTime(), nullable=False),
+    Column("created_at", DateTime()),
+    Column("updated_at", DateTime()),
+    Index("ix_jobs_state_run_after", "state", "run_after"),
 )
 
 mapper_registry.map_imperatively(Account, accounts)
 mapper_registry.map_imperatively(Message, messages)
 mapper_registry.map_imperatively(File, files)
+mapper_registry.map_imperatively(Job, jobs)
@@ -1,25 +1,92 @@
 import os
+from typing import Optional
+
 import orjson
 
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+_engine: Optional[AsyncEngine] = None
+_session_maker: Optional[async_sessionmaker] = None
+_lock_engine: Optional[AsyncEngine] = None
+
 
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
 
-def create_session_maker():
+
+def _url() -> str:
     db_user = os.environ["DB_USER"]
     db_password = os.environ["DB_PASSWORD"]
     db_name = os.environ["DB_NAME"]
     db_host = os.environ["DB_HOST"]
     db_port = os.environ["DB_PORT"]
+    return f"postgresql+asyncpg://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
+
 
-    engine = create_async_engine(
-        f"postgresql+asyncpg://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}",
-        echo=True,
+def create_engine() -> AsyncEngine:
+    return create_async_engine(
+        _url(),
+        echo=_env_bool("DB_ECHO", False),
         isolation_level="SERIALIZABLE",
         json_serializer=orjson.dumps,
         json_deserializer=orjson.loads,
+        pool_size=int(os.environ.get("DB_POOL_SIZE", 10)),
+        max_overflow=int(os.environ.get("DB_MAX_OVERFLOW", 10)),
+        pool_timeout=float(os.environ.get("DB_POOL_TIMEOUT", 30)),
+        pool_recycle=int(os.environ.get("DB_POOL_RECYCLE", 1800)),
+        pool_pre_ping=_env_bool("DB_POOL_PRE_PING", True),
+        connect_args=dict(
+            prepared_statement_cache_size=int(
+                os.environ.get("DB_STATEMENT_CACHE_SIZE", 500)
+            ),
+        ),
     )
-    return async_sessionmaker(
-        engine,
-        autoflush=False,
-        expire_on_commit=False,
-    )
+
+
+def create_session_maker() -> async_sessionmaker:
+    global _engine, _session_maker
+    if _session_maker is None:
+        _engine = create_engine()
+        _session_maker = async_sessionmaker(
+            _engine,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+    return _session_maker
+
+
+def create_lock_engine(pool_size: int) -> AsyncEngine:
+    # Session-level advisory locks live on their own AUTOCOMMIT connections so
+    # a held lock never pins a request connection or an open transaction.
+    global _lock_engine
+    if _lock_engine is None:
+        _lock_engine = create_async_engine(
+            _url(),
+            echo=_env_bool("DB_ECHO", False),
+            isolation_level="AUTOCOMMIT",
+            pool_size=pool_size,
+            # A held lock keeps its connection for the whole download, so
+            # this pool grows with the number of distinct links in flight.
+            max_overflow=-1,
+            pool_recycle=int(os.environ.get("DB_POOL_RECYCLE", 1800)),
+            pool_pre_ping=_env_bool("DB_POOL_PRE_PING", True),
+        )
+    return _lock_engine
+
+
+async def dispose_engine() -> None:
+    global _engine, _session_maker, _lock_engine
+    if _engine is not None:
+        await _engine.dispose()
+    if _lock_engine is not None:
+        await _lock_engine.dispose()
+    _engine = None
+    _session_maker = None
+    _lock_engine = None
@@ -1,3 +1,13 @@
 cd /app/saver
+if [ "$1" = "profile" ]; then
+    python /app/saver/startup.py
+    exit $?
+fi
 alembic upgrade head
-python /app/saver/runserver.py
\ No newline at end of file
+if [ "$1" = "worker" ]; then
+    python /app/saver/worker.py
+elif [ "$1" = "supervisor" ]; then
+    python /app/saver/supervisor.py
+else
+    python /app/saver/runserver.py
+fi
\ No newline at end of file
@@ -2,12 +2,16 @@ import asyncio
 import logging
 import os
 import sys
+from typing import Optional
 
 from aiogram import Dispatcher, Bot
 from aiogram.enums import ParseMode
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
 
 from bot.api.saver import saver_router
 from bot.api.system import system_router
+from bot.application.services import Services
 from db import models
 
 dispatcher = Dispatcher()
@@ -16,9 +20,68 @@ dispatcher.include_router(system_router)
 dispatcher.include_router(saver_router)
 
 
+async def run_polling(bot: Bot, services: Services) -> None:
+    # getUpdates is refused while a webhook is set, e.g. after switching modes.
+    await bot.delete_webhook()
+    await dispatcher.start_polling(bot, services=services)
+
+
+def webhook_app(
+    bot: Bot,
+    services: Services,
+    path: str,
+    secret: Optional[str],
+    dispatcher: Dispatcher = dispatcher,
+) -> web.Application:
+    app = web.Application()
+    # Telegram gets its 200 right away; the update is handled as a task.
+    SimpleRequestHandler(
+        dispatcher=dispatcher,
+        bot=bot,
+        handle_in_background=True,
+        secret_token=secret,
+        services=services,
+    ).register(app, path=path)
+    setup_application(app, dispatcher, bot=bot, services=services)
+    return app
+
+
+async def run_webhook(bot: Bot, services: Services) -> None:
+    path = os.environ.get("WEBHOOK_PATH", "/webhook")
+    secret = os.environ.get("WEBHOOK_SECRET")
+    runner = web.AppRunner(webhook_app(bot, services, path=path, secret=secret))
+    await runner.setup()
+    site = web.TCPSite(
+        runner,
+        host=os.environ.get("WEBHOOK_HOST", "0.0.0.0"),
+        port=int(os.environ.get("WEBHOOK_PORT", 8080)),
+    )
+    await site.start()
+    try:
+        await bot.set_webhook(
+            url=os.environ["WEBHOOK_URL"].rstrip("/") + path,
+            secret_token=secret,
+            max_connections=int(os.environ.get("WEBHOOK_MAX_CONNECTIONS", 40)),
+            allowed_updates=dispatcher.resolve_used_update_types(),
+        )
+        logging.info(f"Webhook server listening on {site.name}")
+        await asyncio.Event().wait()
+    finally:
+        # The webhook stays registered so updates queue up across restarts.
+        await runner.cleanup()
+
+
 async def main() -> None:
     bot = Bot(os.environ.get("TELEGRAM_TOKEN"), parse_mode=ParseMode.HTML)
-    await dispatcher.start_polling(bot)
+    services = Services.create()
+    await services.start(downloads=not services.queue_downloads)
+    try:
+        if os.environ.get("BOT_MODE", "polling") == "webhook":
+            await run_webhook(bot, services)
+        else:
+            await run_polling(bot, services)
+    finally:
+        await services.stop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,97 @@
+import os
+import subprocess
+import sys
+from typing import List, Tuple
+
+# Modules that must only be imported on first use, never at bot startup.
+LAZY_MODULES = [
+    "selenium",
+    "webdriver_manager",
+    "pyrogram",
+    "yandex_music",
+    "mutagen",
+    "pytube",
+    "imageio_ffmpeg",
+]
+
+# Seconds for a cold `import runserver`. aiogram.types alone takes about 2 s,
+# and a healthy tree lands around 2.5-4 s depending on the machine.
+IMPORT_BUDGET = float(os.environ.get("STARTUP_IMPORT_BUDGET", 6))
+
+Entry = Tuple[str, int, int, int]
+
+
+def profile(target: str) -> List[Entry]:
+    # A fresh interpreter so nothing is cached from this process.
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:"):
+                sys.stderr.write(line + "\n")
+        raise SystemExit(f"import {target} failed")
+    entries: List[Entry] = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        own, cumulative, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), depth, int(own), int(cumulative)))
+    return entries
+
+
+def report(entries: List[Entry], top: int) -> None:
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for name, depth, own, cumulative in sorted(
+        entries, key=lambda entry: entry[3], reverse=True
+    )[:top]:
+        print(f"{cumulative / 1000:>14.1f} {own / 1000:>9.1f}  {name}")
+
+
+def target_tree(entries: List[Entry], target: str) -> List[Entry]:
+    # Keep only the target's own import tree, not interpreter startup.
+    end = next(
+        (
+            index
+            for index, (name, depth, _, _) in enumerate(entries)
+            if name == target and depth == 0
+        ),
+        None,
+    )
+    if end is None:
+        # Already imported during interpreter startup, e.g. a stdlib module.
+        raise SystemExit(f"import {target} did not show up in the import profile")
+    start = max(
+        (index + 1 for index in range(end) if entries[index][1] == 0), default=0
+    )
+    return entries[start : end + 1]
+
+
+def eager_modules(entries: List[Entry]) -> List[str]:
+    return sorted({name.split(".")[0] for name, _, _, _ in entries} & set(LAZY_MODULES))
+
+
+def main() -> int:
+    target = os.environ.get("STARTUP_PROFILE_TARGET", "runserver")
+    budget = IMPORT_BUDGET
+    entries = target_tree(profile(target), target)
+    report(entries, top=int(os.environ.get("STARTUP_PROFILE_TOP", 25)))
+
+    total = entries[-1][3]
+    print(f"\nimport {target}: {total / 1e6:.2f}s (budget {budget:.2f}s)")
+    failed = total / 1e6 > budget
+    if failed:
+        print("Startup import budget exceeded")
+    eager = eager_modules(entries)
+    if eager:
+        failed = True
+        print(f"Imported eagerly, should be lazy: {', '.join(eager)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,316 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import traceback
+from multiprocessing.sharedctypes import Synchronized
+from queue import Empty
+from typing import Any, Callable, Dict, List, Optional
+
+from aiogram import Bot
+from aiogram.enums import ParseMode
+from aiogram.types import Update
+from aiohttp import web
+
+logger = logging.getLogger("saver.supervisor")
+
+_STOP = None
+
+
+def chat_key(update: Update) -> int:
+    # Everything from one chat (or one user, for inline queries) goes to the
+    # same worker so it is handled in the order Telegram sent it.
+    event = update.event
+    chat = getattr(event, "chat", None) or getattr(
+        getattr(event, "message", None), "chat", None
+    )
+    if chat is not None:
+        return chat.id
+    user = getattr(event, "from_user", None)
+    return user.id if user is not None else update.update_id
+
+
+class ChatSequencer:
+    def __init__(self):
+        self._tails: Dict[int, asyncio.Task] = {}
+
+    def submit(self, chat_id: int, coro) -> asyncio.Task:
+        previous = self._tails.get(chat_id)
+        task = asyncio.create_task(self._run(previous, coro))
+        self._tails[chat_id] = task
+        task.add_done_callback(lambda done: self._release(chat_id, done))
+        return task
+
+    async def drain(self) -> None:
+        if self._tails:
+            await asyncio.wait(list(self._tails.values()))
+
+    @staticmethod
+    async def _run(previous: Optional[asyncio.Task], coro) -> None:
+        if previous is not None:
+            await asyncio.wait([previous])
+        await coro
+
+    def _release(self, chat_id: int, task: asyncio.Task) -> None:
+        if self._tails.get(chat_id) is task:
+            del self._tails[chat_id]
+
+
+async def serve(index: int, queue: multiprocessing.Queue, pending: Synchronized):
+    from bot.application.services import Services
+    from runserver import dispatcher
+
+    bot = Bot(os.environ.get("TELEGRAM_TOKEN"), parse_mode=ParseMode.HTML)
+    services = Services.create()
+    await services.start(downloads=not services.queue_downloads)
+    sequencer = ChatSequencer()
+    loop = asyncio.get_running_loop()
+
+    async def handle(update: Dict[str, Any]) -> None:
+        try:
+            await dispatcher.feed_raw_update(bot, update, services=services)
+        except Exception:
+            logger.error(f"Worker {index} update failed - {traceback.format_exc()}")
+        finally:
+            with pending.get_lock():
+                pending.value -= 1
+
+    logger.info(f"Worker {index} ready (pid {os.getpid()})")
+    try:
+        while True:
+            item = await loop.run_in_executor(None, queue.get)
+            if item is _STOP:
+                break
+            chat_id, update = item
+            sequencer.submit(chat_id, handle(update))
+        await sequencer.drain()
+    finally:
+        await services.stop()
+        await bot.session.close()
+
+
+def work(index: int, queue: multiprocessing.Queue, pending: Synchronized) -> None:
+    # The supervisor owns shutdown; workers stop on the queue sentinel.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.basicConfig(level=logging.INFO, stream=sys.stdout)
+    asyncio.run(serve(index, queue, pending))
+
+
+class WorkerHandle:
+    def __init__(self, index: int, context, target: Callable[..., None] = work):
+        self.index = index
+        self.context = context
+        self.target = target
+        self.queue: Optional[multiprocessing.Queue] = None
+        self.pending: Optional[Synchronized] = None
+        self.restarts = 0
+        self.process: Optional[multiprocessing.Process] = None
+
+    def start(self) -> None:
+        # Always a fresh queue: a worker killed inside get() leaves the old
+        # queue's read lock held, and a successor on it would block forever.
+        backlog = self._drain()
+        self.queue = self.context.Queue()
+        self.pending = self.context.Value("i", 0)
+        for chat_id, update in backlog:
+            self.put(chat_id, update)
+        self.process = self.context.Process(
+            target=self.target,
+            args=(self.index, self.queue, self.pending),
+            name=f"saver-worker-{self.index}",
+        )
+        self.process.start()
+
+    def _drain(self) -> List[Any]:
+        # Non-blocking, so a read lock held by the dead worker just ends it.
+        if self.queue is None:
+            return []
+        backlog = []
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except (Empty, EOFError, OSError):
+                break
+            if item is not _STOP:
+                backlog.append(item)
+        lost = self.pending.value - len(backlog)
+        if lost > 0:
+            logger.warning(f"Worker {self.index} lost {lost} updates")
+        self.queue.close()
+        # The feeder may be stuck on a full pipe nobody reads any more.
+        self.queue.cancel_join_thread()
+        return backlog
+
+    def put(self, chat_id: int, update: Dict[str, Any]) -> None:
+        with self.pending.get_lock():
+            self.pending.value += 1
+        self.queue.put((chat_id, update))
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(
+            worker=self.index,
+            pid=self.process.pid if self.process else None,
+            alive=bool(self.process and self.process.is_alive()),
+            pending=self.pending.value,
+            restarts=self.restarts,
+        )
+
+
+class Supervisor:
+    def __init__(
+        self,
+        workers: int = int(os.environ.get("SUPERVISOR_WORKERS", os.cpu_count() or 1)),
+        check_interval: float = float(
+            os.environ.get("SUPERVISOR_CHECK_INTERVAL", 1)
+        ),
+        stats_interval: float = float(
+            os.environ.get("SUPERVISOR_STATS_INTERVAL", 60)
+        ),
+        stop_timeout: float = float(os.environ.get("SUPERVISOR_STOP_TIMEOUT", 30)),
+    ):
+        context = multiprocessing.get_context("spawn")
+        self.workers = [WorkerHandle(index, context) for index in range(workers)]
+        self.check_interval = check_interval
+        self.stats_interval = stats_interval
+        self.stop_timeout = stop_timeout
+
+    def start(self) -> None:
+        for worker in self.workers:
+            worker.start()
+
+    def route(self, update: Update, raw: Dict[str, Any]) -> None:
+        chat_id = chat_key(update)
+        self.workers[chat_id % len(self.workers)].put(chat_id, raw)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [worker.stats() for worker in self.workers]
+
+    async def watch(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_stats = loop.time() + self.stats_interval
+        while True:
+            await asyncio.sleep(self.check_interval)
+            for worker in self.workers:
+                if not worker.process.is_alive():
+                    logger.error(
+                        f"Worker {worker.index} died with code "
+                        f"{worker.process.exitcode}, restarting"
+                    )
+                    worker.restarts += 1
+                    worker.start()
+            if loop.time() >= next_stats:
+                next_stats = loop.time() + self.stats_interval
+                logger.info(f"Worker stats: {self.stats()}")
+
+    async def stop(self) -> None:
+        for worker in self.workers:
+            worker.queue.put(_STOP)
+        loop = asyncio.get_running_loop()
+        for worker in self.workers:
+            await loop.run_in_executor(None, worker.process.join, self.stop_timeout)
+            if worker.process.is_alive():
+                logger.warning(f"Worker {worker.index} did not stop, terminating")
+                worker.process.terminate()
+
+
+async def poll(bot: Bot, supervisor: Supervisor, allowed_updates: List[str]) -> None:
+    await bot.delete_webhook()
+    offset: Optional[int] = None
+    while True:
+        try:
+            updates = await bot.get_updates(
+                offset=offset,
+                timeout=int(os.environ.get("POLLING_TIMEOUT", 30)),
+                allowed_updates=allowed_updates,
+            )
+        except Exception:
+            logger.exception("getUpdates failed, retrying")
+            await asyncio.sleep(1)
+            continue
+        for update in updates:
+            supervisor.route(
+                update, update.model_dump(mode="json", by_alias=True, exclude_none=True)
+            )
+            offset = update.update_id + 1
+
+
+def webhook_app(bot: Bot, supervisor: Supervisor) -> web.Application:
+    secret = os.environ.get("WEBHOOK_SECRET")
+
+    async def receive(request: web.Request) -> web.Response:
+        if secret and request.headers.get("X-Telegram-Bot-Api-Secret-Token") != secret:
+            return web.Response(status=401)
+        raw = await request.json()
+        supervisor.route(Update.model_validate(raw, context={"bot": bot}), raw)
+        return web.Response()
+
+    async def stats(request: web.Request) -> web.Response:
+        return web.json_response(supervisor.stats())
+
+    app = web.Application()
+    app.router.add_post(os.environ.get("WEBHOOK_PATH", "/webhook"), receive)
+    app.router.add_get(os.environ.get("SUPERVISOR_STATS_PATH", "/workers"), stats)
+    return app
+
+
+async def listen(bot: Bot, supervisor: Supervisor, allowed_updates: List[str]):
+    path = os.environ.get("WEBHOOK_PATH", "/webhook")
+    runner = web.AppRunner(webhook_app(bot, supervisor))
+    await runner.setup()
+    await web.TCPSite(
+        runner,
+        host=os.environ.get("WEBHOOK_HOST", "0.0.0.0"),
+        port=int(os.environ.get("WEBHOOK_PORT", 8080)),
+    ).start()
+    try:
+        await bot.set_webhook(
+            url=os.environ["WEBHOOK_URL"].rstrip("/") + path,
+            secret_token=os.environ.get("WEBHOOK_SECRET"),
+            max_connections=int(os.environ.get("WEBHOOK_MAX_CONNECTIONS", 40)),
+            allowed_updates=allowed_updates,
+        )
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+async def main() -> None:
+    from runserver import dispatcher
+
+    bot = Bot(os.environ.get("TELEGRAM_TOKEN"), parse_mode=ParseMode.HTML)
+    supervisor = Supervisor()
+    supervisor.start()
+    logger.info(f"Supervisor started {len(supervisor.workers)} workers")
+
+    if os.environ.get("BOT_MODE", "polling") == "webhook":
+        ingest = listen
+    else:
+        ingest = poll
+    tasks: List[asyncio.Task] = [
+        asyncio.create_task(
+            ingest(bot, supervisor, dispatcher.resolve_used_update_types())
+        ),
+        asyncio.create_task(supervisor.watch()),
+    ]
+    stopped = asyncio.Event()
+    for task in tasks:
+        # Either loop ending on its own is fatal; shut everything down.
+        task.add_done_callback(lambda _: stopped.set())
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopped.set)
+    try:
+        await stopped.wait()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await supervisor.stop()
+        await bot.session.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, stream=sys.stdout)
+    asyncio.run(main())
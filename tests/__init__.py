@@ -0,0 +1,12 @@
+import os
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def fixture_path(*parts: str) -> str:
+    return os.path.join(FIXTURES, *parts)
+
+
+def fixture_text(*parts: str) -> str:
+    with open(fixture_path(*parts), encoding="utf-8") as fixture:
+        return fixture.read()
@@ -0,0 +1,4 @@
+import os
+
+# Backends read TEMP_DIR at import time.
+os.environ.setdefault("TEMP_DIR", "/tmp")
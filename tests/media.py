@@ -0,0 +1,32 @@
+import subprocess
+
+
+def make_mp4(
+    path: str,
+    duration: int = 75,
+    size: str = "640x360",
+    faststart: bool = True,
+) -> str:
+    from imageio_ffmpeg import get_ffmpeg_exe
+
+    # Low frame rate and a fast preset keep a long clip cheap to encode.
+    command = [
+        get_ffmpeg_exe(),
+        "-loglevel",
+        "error",
+        "-y",
+        "-f",
+        "lavfi",
+        "-i",
+        f"testsrc=duration={duration}:size={size}:rate=5",
+        "-c:v",
+        "libx264",
+        "-preset",
+        "ultrafast",
+        "-pix_fmt",
+        "yuv420p",
+    ]
+    if faststart:
+        command += ["-movflags", "+faststart"]
+    subprocess.run(command + [path], check=True, capture_output=True)
+    return path
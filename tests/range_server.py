@@ -0,0 +1,97 @@
+import re
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, List, Optional, Set
+
+_RANGE = re.compile(r"bytes=(\d+)-(\d*)")
+
+
+class RangeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        data: bytes,
+        ranges: bool = True,
+        rate: Optional[float] = None,
+        drop_after: Optional[int] = None,
+    ):
+        super().__init__(("127.0.0.1", 0), RangeHandler)
+        self.data = data
+        # Advertise ranges but answer 200 with the whole body when False.
+        self.ranges = ranges
+        # Bytes per second per connection, like a throttling CDN.
+        self.rate = rate
+        # Cut the first response for each range end after this many bytes, so
+        # a resumed request (same end, later start) goes through.
+        self.drop_after = drop_after
+        self.requests: List[Optional[str]] = []
+        self._dropped: Set[int] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/blob.bin"
+
+    def should_drop(self, end: int) -> bool:
+        if self.drop_after is None:
+            return False
+        with self._lock:
+            if end in self._dropped:
+                return False
+            self._dropped.add(end)
+            return True
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: RangeServer
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_HEAD(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(self.server.data)))
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+
+    def do_GET(self) -> None:
+        data = self.server.data
+        header = self.headers.get("Range")
+        self.server.requests.append(header)
+        start, end = 0, len(data) - 1
+        match = _RANGE.match(header or "")
+        if match and self.server.ranges:
+            start = int(match.group(1))
+            end = min(int(match.group(2) or end), end)
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        else:
+            self.send_response(200)
+        body = data[start : end + 1]
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.server.should_drop(end) and len(body) > self.server.drop_after:
+            self.wfile.write(body[: self.server.drop_after])
+            self.close_connection = True
+            return
+        step = 256 * 1024
+        for index in range(0, len(body), step):
+            self.wfile.write(body[index : index + step])
+            if self.server.rate:
+                time.sleep(step / self.server.rate)
+
+
+@contextmanager
+def serve(data: bytes, **options) -> Iterator[RangeServer]:
+    server = RangeServer(data, **options)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+from selenium.common.exceptions import InvalidSessionIdException, TimeoutException
+
+from backends.browser_pool import BrowserPool, BrowserSession
+
+
+class StubDriver:
+    def __init__(self):
+        self.alive = True
+        self.quit_calls = 0
+
+    def execute_script(self, script: str):
+        if not self.alive:
+            raise InvalidSessionIdException("session deleted")
+        return 1
+
+    def delete_all_cookies(self) -> None:
+        pass
+
+    def get(self, url: str) -> None:
+        pass
+
+    def get_log(self, kind: str) -> list:
+        return []
+
+    def quit(self) -> None:
+        self.quit_calls += 1
+
+
+class StubPool(BrowserPool):
+    def __init__(self, **options):
+        super().__init__(**dict(size=1, acquire_timeout=0.5) | options)
+        self._driver_path = "chromedriver"
+        self.created = []
+        self.fail_create = False
+
+    async def _create(self) -> BrowserSession:
+        if self.fail_create:
+            raise RuntimeError("Chrome would not launch")
+        driver = StubDriver()
+        self.created.append(driver)
+        return BrowserSession(driver=driver)
+
+
+async def test_page_timeout_keeps_warm_browser():
+    pool = StubPool()
+    with pytest.raises(TimeoutException):
+        async with pool.session():
+            raise TimeoutException("no video on page")
+    async with pool.session() as driver:
+        assert driver is pool.created[0]
+    assert len(pool.created) == 1
+    assert pool.created[0].quit_calls == 0
+
+
+async def test_crashed_browser_is_replaced():
+    pool = StubPool()
+    with pytest.raises(InvalidSessionIdException):
+        async with pool.session() as driver:
+            driver.alive = False
+            raise InvalidSessionIdException("session deleted")
+    assert pool.created[0].quit_calls == 1
+    async with pool.session() as driver:
+        assert driver is pool.created[1]
+
+
+async def test_failed_relaunch_keeps_result_and_slot():
+    pool = StubPool(max_uses=1)
+    await pool.start()
+    pool.fail_create = True
+    async with pool.session():
+        result = "video"
+    assert result == "video"
+
+    # The slot came back; the next checkout relaunches lazily.
+    with pytest.raises(RuntimeError):
+        async with pool.session():
+            pass
+    pool.fail_create = False
+    async with pool.session() as driver:
+        assert driver is pool.created[-1]
+    assert pool._slots._value == 1
+
+
+async def test_slot_released_when_checkout_fails():
+    pool = StubPool()
+    await pool.start()
+    pool.created[0].alive = False
+    pool.fail_create = True
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            async with pool.session():
+                pass
+    pool.fail_create = False
+    await asyncio.wait_for(pool._slots.acquire(), 0.1)
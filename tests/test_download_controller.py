@@ -0,0 +1,72 @@
+import httpx
+
+from bot.application.controllers.download import DownloadController
+from bot.application.workspaces import WorkspaceManager
+
+
+class StubBackend:
+    path = None
+
+    def stream_source(self):
+        return "https://cdn.example.com/video.mp4"
+
+
+class StubBot:
+    async def edit_message_text(self, **kwargs) -> None:
+        pass
+
+
+class StubServices:
+    session_maker = None
+    uploader = None
+
+    def __init__(self, root):
+        self.workspaces = WorkspaceManager(root=str(root), sweep_interval=0)
+
+
+def make_controller(tmp_path) -> DownloadController:
+    return DownloadController(
+        bot=StubBot(),
+        services=StubServices(tmp_path),
+        account_id=1,
+        chat_id=1,
+        language_code="en",
+        link="https://www.instagram.com/p/Cx1AbCdEfGh/",
+        status_message_id=1,
+    )
+
+
+async def test_failed_stream_falls_back_to_workspace(tmp_path, monkeypatch):
+    controller = make_controller(tmp_path)
+    backend = StubBackend()
+    calls = []
+
+    async def no_cached_file():
+        return None, None
+
+    async def prepare_backend(link):
+        controller.size = 1000
+        controller.large = False
+        return backend
+
+    async def send_stream(url):
+        calls.append("stream")
+        raise httpx.ReadError("source went away")
+
+    async def prepare_file(backend):
+        calls.append(("download", backend.path))
+        return object()
+
+    async def classic_response(result):
+        return dict(file_id="file-id", format="mp4")
+
+    monkeypatch.setattr(controller, "_get_file_by_link", no_cached_file)
+    monkeypatch.setattr(controller, "_prepare_backend", prepare_backend)
+    monkeypatch.setattr(controller, "_send_stream", send_stream)
+    monkeypatch.setattr(controller, "_prepare_file", prepare_file)
+    monkeypatch.setattr(controller, "_classic_response", classic_response)
+
+    assert await controller._download() == ("file-id", "mp4")
+    assert calls[0] == "stream"
+    assert calls[1][0] == "download"
+    assert calls[1][1].startswith(str(tmp_path))
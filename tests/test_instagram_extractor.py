@@ -0,0 +1,94 @@
+import pytest
+
+from backends.extractors.instagram import (
+    candidate_pages,
+    parse_json_video_url,
+    parse_og_video_url,
+    parse_video_tag_url,
+    parse_video_url,
+)
+from tests import fixture_text
+
+EMBED_URL = (
+    "https://scontent.cdninstagram.com/o1/v/t16/f1/m82/embed.mp4"
+    "?efg=eyJ2%3D&_nc_ht=scontent.cdninstagram.com&oh=00_AfB"
+)
+OG_URL = (
+    "https://scontent.cdninstagram.com/o1/v/t16/f1/m82/og.mp4"
+    "?stp=dst-mp4&_nc_ht=scontent.cdninstagram.com"
+)
+ESCAPED_URL = (
+    "https://scontent.cdninstagram.com/o1/v/t16/f1/m82/escaped.mp4"
+    "?efg=eyJ2&_nc_ht=scontent.cdninstagram.com"
+)
+TAG_URL = "https://scontent.cdninstagram.com/o1/v/t16/f1/m82/tag.mp4?a=1&b=2"
+
+
+def page(name: str) -> str:
+    return fixture_text("instagram", name)
+
+
+def test_json_video_url_from_embed():
+    assert parse_json_video_url(page("embed.html")) == EMBED_URL
+
+
+def test_json_video_url_from_escaped_payload():
+    assert parse_json_video_url(page("escaped_json.html")) == ESCAPED_URL
+
+
+def test_json_video_url_missing():
+    assert parse_json_video_url(page("og.html")) is None
+
+
+def test_og_video_url_prefers_secure_url_and_unescapes():
+    assert parse_og_video_url(page("og.html")) == OG_URL
+
+
+def test_og_video_url_skips_blob():
+    html = '<meta property="og:video" content="blob:https://www.instagram.com/1" />'
+    assert parse_og_video_url(html) is None
+
+
+def test_og_video_url_missing():
+    assert parse_og_video_url(page("embed.html")) is None
+
+
+def test_video_tag_url():
+    assert parse_video_tag_url(page("video_tag.html")) == TAG_URL
+
+
+def test_video_tag_url_skips_blob():
+    assert parse_video_tag_url(page("escaped_json.html")) is None
+
+
+@pytest.mark.parametrize(
+    "name, expected",
+    [
+        ("embed.html", EMBED_URL),
+        ("og.html", OG_URL),
+        ("escaped_json.html", ESCAPED_URL),
+        ("video_tag.html", TAG_URL),
+    ],
+)
+def test_parse_video_url(name, expected):
+    assert parse_video_url(page(name)) == expected
+
+
+@pytest.mark.parametrize(
+    "link",
+    [
+        "https://www.instagram.com/p/Cx1AbCdEfGh/",
+        "https://instagram.com/reel/Cx1AbCdEfGh/?igsh=abc",
+        "https://www.instagram.com/someone/reels/Cx1AbCdEfGh/",
+    ],
+)
+def test_candidate_pages_tries_embed_first(link):
+    assert list(candidate_pages(link)) == [
+        "https://www.instagram.com/p/Cx1AbCdEfGh/embed/captioned/",
+        link,
+    ]
+
+
+def test_candidate_pages_without_shortcode():
+    link = "https://www.instagram.com/someone/"
+    assert list(candidate_pages(link)) == [link]
@@ -0,0 +1,27 @@
+from urllib.parse import urlparse
+
+import pytest
+
+from backends.keys import yandex_music_key, yandex_music_track_id
+from backends.registry import registry
+
+
+@pytest.mark.parametrize(
+    "link",
+    [
+        "https://music.yandex.ru/track/123",
+        "https://music.yandex.ru/album/1/track/123/",
+        "https://music.yandex.com/album/1/track/123?utm_source=share",
+    ],
+)
+def test_yandex_music_track_id_matches_key(link):
+    url = urlparse(link)
+    assert yandex_music_track_id(url) == 123
+    assert yandex_music_key(url) == "yandex_music:123"
+    assert registry.media_key(link) == "yandex_music:123"
+
+
+def test_yandex_music_track_id_missing():
+    url = urlparse("https://music.yandex.ru/album/1/")
+    assert yandex_music_track_id(url) is None
+    assert yandex_music_key(url) is None
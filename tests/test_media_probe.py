@@ -0,0 +1,69 @@
+import struct
+
+import pytest
+
+from bot.application.media_probe import probe_mp4, probe_video, read_moov
+from tests.media import make_mp4
+
+pytest.importorskip("imageio_ffmpeg")
+
+EXPECTED = dict(duration=75, width=640, height=360)
+
+
+@pytest.fixture(scope="module", params=["faststart", "moov_at_end"])
+def video(request, tmp_path_factory):
+    path = tmp_path_factory.mktemp("media") / f"{request.param}.mp4"
+    return make_mp4(str(path), faststart=request.param == "faststart")
+
+
+def read(path) -> bytes:
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def top_level_boxes(data: bytes) -> dict:
+    offsets, offset = {}, 0
+    while offset + 8 <= len(data):
+        size, kind = struct.unpack(">I4s", data[offset : offset + 8])
+        offsets[kind] = offset
+        offset += size
+    return offsets
+
+
+def moov_offset(data: bytes) -> int:
+    return top_level_boxes(data)[b"moov"]
+
+
+def test_moov_placement(video):
+    boxes = top_level_boxes(read(video))
+    if video.endswith("faststart.mp4"):
+        assert boxes[b"moov"] < boxes[b"mdat"]
+    else:
+        assert boxes[b"moov"] > boxes[b"mdat"]
+
+
+def test_probe_mp4_whole_file(video):
+    assert probe_mp4(read(video)) == EXPECTED
+
+
+def test_probe_mp4_moov_only(video):
+    moov = read_moov(video)
+    assert moov[4:8] == b"moov"
+    assert probe_mp4(moov) == EXPECTED
+
+
+def test_probe_mp4_needs_whole_moov(video):
+    moov = read_moov(video)
+    assert probe_mp4(moov[: len(moov) // 2]) is None
+
+
+def test_probe_mp4_head_of_file(video):
+    data = read(video)
+    head = data[: moov_offset(data) + 64]
+    assert probe_mp4(head) is None
+
+
+def test_probe_video(video):
+    meta = probe_video(video)
+    assert {key: meta[key] for key in EXPECTED} == EXPECTED
+    assert meta["thumbnail"].startswith(b"\xff\xd8")
@@ -0,0 +1,82 @@
+import os
+
+import pytest
+
+from backends.downloader import Downloader
+from backends.http import close_http_client
+from backends.segmented import SegmentedDownloader
+from tests.range_server import serve
+
+SIZE = 3 * 1024 * 1024 + 12345
+DATA = os.urandom(SIZE)
+HEADER = b"ID3\x04\x00\x00\x00\x00\x00\x0ftitle"
+
+
+@pytest.fixture(autouse=True)
+async def http_client():
+    yield
+    # The shared client is bound to this test's event loop.
+    await close_http_client()
+
+
+def make_downloader(**options) -> SegmentedDownloader:
+    options = dict(
+        base=Downloader(chunk_size=64 * 1024),
+        segment_size=1024 * 1024,
+        min_size=0,
+        initial_workers=2,
+        max_workers=4,
+        retries=2,
+        adapt_interval=0.1,
+    ) | options
+    return SegmentedDownloader(**options)
+
+
+def read(path) -> bytes:
+    with open(path, "rb") as file:
+        return file.read()
+
+
+async def test_segments_reassemble(tmp_path):
+    path = tmp_path / "out.bin"
+    with serve(DATA) as server:
+        assert await make_downloader().download(server.url, str(path)) == SIZE
+    assert read(path) == DATA
+    assert all(request.startswith("bytes=") for request in server.requests)
+    assert len(server.requests) == 4
+
+
+async def test_header_shifts_body(tmp_path):
+    path = tmp_path / "out.bin"
+    with serve(DATA) as server:
+        await make_downloader().download(
+            server.url, str(path), size=SIZE, header=HEADER
+        )
+    assert read(path) == HEADER + DATA
+
+
+async def test_segment_resumes_from_last_byte(tmp_path):
+    path = tmp_path / "out.bin"
+    drop_after = 300 * 1024
+    with serve(DATA, drop_after=drop_after) as server:
+        await make_downloader().download(server.url, str(path), header=HEADER)
+    assert read(path) == HEADER + DATA
+    # Each full segment was cut once and resumed past what it had written,
+    # rather than fetched again from its first byte.
+    starts = [
+        int(request[len("bytes=") :].split("-")[0]) for request in server.requests
+    ]
+    for segment in range(3):
+        first = segment * 1024 * 1024
+        assert starts.count(first) == 1
+        assert any(first < start <= first + drop_after for start in starts)
+    assert len(starts) == 7
+
+
+async def test_falls_back_when_range_is_ignored(tmp_path):
+    path = tmp_path / "out.bin"
+    with serve(DATA, ranges=False) as server:
+        await make_downloader().download(server.url, str(path), header=HEADER)
+    assert read(path) == HEADER + DATA
+    # The stream fallback asks for the whole file without a Range header.
+    assert server.requests[-1] is None
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from bot.application import singleflight
+from bot.application.singleflight import SingleFlight
+
+
+class StubConnection:
+    def __init__(self, engine):
+        self.engine = engine
+        self.held = set()
+
+    async def scalar(self, query, params):
+        key = params["key"]
+        if key in self.engine.locks:
+            return False
+        self.engine.locks[key] = self
+        self.held.add(key)
+        return True
+
+    async def execute(self, query, params):
+        key = params["key"]
+        assert self.engine.locks.pop(key) is self
+        self.held.discard(key)
+
+    async def invalidate(self):
+        pass
+
+    async def close(self):
+        self.engine.open -= 1
+
+
+class StubEngine:
+    def __init__(self):
+        self.locks = {}
+        self.open = 0
+
+    async def connect(self):
+        self.open += 1
+        return StubConnection(self)
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = StubEngine()
+    monkeypatch.setattr(singleflight, "create_lock_engine", lambda pool_size: engine)
+    return engine
+
+
+async def test_no_leader_cap_without_advisory_locks():
+    flights = SingleFlight(advisory_locks=False, max_leaders=1)
+    running = []
+
+    async def fn():
+        running.append(1)
+        await asyncio.sleep(0.05)
+        return len(running)
+
+    results = await asyncio.gather(*(flights.do(str(key), fn) for key in range(4)))
+    assert results == [4, 4, 4, 4]
+
+
+async def test_leaders_run_concurrently_under_advisory_locks(engine):
+    flights = SingleFlight(advisory_locks=True, max_leaders=1, poll_interval=0.01)
+    release = asyncio.Event()
+    started = []
+
+    async def fn():
+        started.append(1)
+        await release.wait()
+
+    tasks = [asyncio.create_task(flights.do(str(key), fn)) for key in range(3)]
+    await asyncio.sleep(0.05)
+    # One slot, yet every distinct key took its lock and is running.
+    assert len(started) == 3
+    assert len(engine.locks) == 3
+    release.set()
+    await asyncio.gather(*tasks)
+    assert engine.locks == {} and engine.open == 0
+
+
+async def test_busy_key_does_not_block_other_keys(engine):
+    flights = SingleFlight(advisory_locks=True, max_leaders=1, poll_interval=0.01)
+    # Another process holds "busy".
+    engine.locks["busy"] = object()
+
+    async def fn():
+        return "done"
+
+    waiting = asyncio.create_task(flights.do("busy", fn))
+    await asyncio.sleep(0.05)
+    assert await asyncio.wait_for(flights.do("free", fn), 1) == "done"
+    assert not waiting.done()
+
+    del engine.locks["busy"]
+    assert await asyncio.wait_for(waiting, 1) == "done"
+    assert engine.open == 0
+
+
+async def test_lock_timeout_goes_ahead(engine):
+    flights = SingleFlight(
+        advisory_locks=True, max_leaders=1, lock_timeout=0.05, poll_interval=0.01
+    )
+    engine.locks["busy"] = object()
+
+    async def fn():
+        return "done"
+
+    assert await flights.do("busy", fn) == "done"
+    assert engine.open == 0
@@ -0,0 +1,26 @@
+import os
+
+import pytest
+
+import startup
+
+TARGET = os.environ.get("STARTUP_PROFILE_TARGET", "runserver")
+
+
+@pytest.fixture(scope="module")
+def entries():
+    return startup.target_tree(startup.profile(TARGET), TARGET)
+
+
+def test_no_lazy_modules_imported_at_startup(entries):
+    assert startup.eager_modules(entries) == []
+
+
+def test_startup_import_budget(entries):
+    assert entries[-1][3] / 1e6 <= startup.IMPORT_BUDGET
+
+
+def test_target_tree_requires_target():
+    entries = [("site", 0, 10, 10)]
+    with pytest.raises(SystemExit):
+        startup.target_tree(entries, "runserver")
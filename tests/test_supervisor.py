@@ -0,0 +1,72 @@
+import multiprocessing
+import os
+import signal
+import time
+
+from supervisor import _STOP, WorkerHandle
+
+
+def consume(index, queue, pending) -> None:
+    while True:
+        item = queue.get()
+        if item is _STOP:
+            return
+        with pending.get_lock():
+            pending.value -= 1
+
+
+def exit_at_once(index, queue, pending) -> None:
+    pass
+
+
+def wait_for(predicate, timeout: float = 10) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return predicate()
+
+
+def restart(handle: WorkerHandle, target) -> None:
+    handle.process.join(10)
+    handle.target = target
+    handle.start()
+
+
+def stop(handle: WorkerHandle) -> None:
+    handle.queue.put(_STOP)
+    handle.process.join(10)
+    assert not handle.process.is_alive()
+
+
+def test_restart_after_kill_inside_get():
+    handle = WorkerHandle(0, multiprocessing.get_context("spawn"), target=consume)
+    handle.start()
+    handle.put(1, {"update_id": 1})
+    assert wait_for(lambda: handle.pending.value == 0)
+
+    # Now blocked in get() holding the queue's read lock.
+    os.kill(handle.process.pid, signal.SIGKILL)
+    restart(handle, consume)
+    handle.put(1, {"update_id": 2})
+    assert wait_for(lambda: handle.pending.value == 0)
+    stop(handle)
+
+
+def test_restart_carries_queued_updates_over():
+    handle = WorkerHandle(0, multiprocessing.get_context("spawn"), target=exit_at_once)
+    handle.start()
+    handle.process.join(10)
+    for update_id in range(3):
+        handle.put(1, {"update_id": update_id})
+    # Let the feeder thread flush into the pipe.
+    assert wait_for(lambda: not handle.queue.empty())
+    time.sleep(0.2)
+
+    restart(handle, exit_at_once)
+    assert handle.pending.value == 3
+    restart(handle, consume)
+    assert handle.pending.value == 3
+    assert wait_for(lambda: handle.pending.value == 0)
+    stop(handle)
@@ -0,0 +1,66 @@
+import asyncio
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Message
+
+from runserver import webhook_app
+
+SECRET = "s3cret"
+UPDATE = {
+    "update_id": 1,
+    "message": {
+        "message_id": 10,
+        "date": 1700000000,
+        "chat": {"id": 42, "type": "private"},
+        "from": {"id": 42, "is_bot": False, "first_name": "Test"},
+        "text": "hello",
+    },
+}
+
+
+async def make_client(aiohttp_client, handler):
+    router = Router()
+    router.message()(handler)
+    dispatcher = Dispatcher()
+    dispatcher.include_router(router)
+    bot = Bot("42:TEST")
+    services = object()
+    app = webhook_app(
+        bot, services, path="/webhook", secret=SECRET, dispatcher=dispatcher
+    )
+    return await aiohttp_client(app), services
+
+
+async def test_rejects_bad_secret(aiohttp_client):
+    async def handler(message: Message) -> None:
+        raise AssertionError("update must not be handled")
+
+    client, _ = await make_client(aiohttp_client, handler)
+    response = await client.post(
+        "/webhook", json=UPDATE, headers={"X-Telegram-Bot-Api-Secret-Token": "nope"}
+    )
+    assert response.status == 401
+
+
+async def test_answers_before_handling(aiohttp_client):
+    release = asyncio.Event()
+    handled = asyncio.get_running_loop().create_future()
+
+    async def handler(message: Message, services) -> None:
+        await release.wait()
+        handled.set_result((message.text, services))
+
+    client, services = await make_client(aiohttp_client, handler)
+    response = await asyncio.wait_for(
+        client.post(
+            "/webhook", json=UPDATE, headers={"X-Telegram-Bot-Api-Secret-Token": SECRET}
+        ),
+        timeout=5,
+    )
+    assert response.status == 200
+    assert not handled.done()
+
+    release.set()
+    text, injected = await asyncio.wait_for(handled, timeout=5)
+    assert text == "hello"
+    assert injected is services
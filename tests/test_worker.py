@@ -0,0 +1,46 @@
+import asyncio
+from types import SimpleNamespace
+
+import worker
+
+
+class FlakyJobs:
+    def __init__(self):
+        self.claims = 0
+        self.completed = []
+
+    async def claim(self):
+        self.claims += 1
+        if self.claims == 1:
+            raise ConnectionError("database restarted")
+        if self.claims in (2, 3):
+            return SimpleNamespace(id=self.claims, attempts=1, link="link")
+        return None
+
+    async def heartbeat(self, job):
+        await asyncio.Event().wait()
+
+    async def complete(self, job):
+        if job.id == 2:
+            raise ConnectionError("database restarted")
+        self.completed.append(job.id)
+
+
+async def test_slot_survives_transient_errors(monkeypatch):
+    monkeypatch.setenv("WORKER_POLL_INTERVAL", "0.01")
+
+    async def process(bot, services, job):
+        pass
+
+    monkeypatch.setattr(worker, "process", process)
+    jobs = FlakyJobs()
+    slot = asyncio.create_task(worker.run_slot(bot=None, services=None, jobs=jobs))
+    try:
+        for _ in range(100):
+            if jobs.claims > 4:
+                break
+            await asyncio.sleep(0.01)
+        assert not slot.done()
+        assert jobs.completed == [3]
+    finally:
+        slot.cancel()
@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import os
+import sys
+import traceback
+
+from aiogram import Bot
+from aiogram.enums import ParseMode
+
+from bot.application.controllers.download import DownloadController
+from bot.application.jobs import JobQueue
+from bot.application.models import Job
+from bot.application.services import Services
+from db import models
+
+logger = logging.getLogger("saver.worker")
+
+
+async def process(bot: Bot, services: Services, job: Job) -> None:
+    await DownloadController(
+        bot=bot,
+        services=services,
+        account_id=job.account_id,
+        chat_id=job.chat_id,
+        language_code=job.language_code,
+        link=job.link,
+        status_message_id=job.status_message_id,
+    ).call()
+
+
+async def run_job(bot: Bot, services: Services, jobs: JobQueue, job: Job) -> None:
+    logger.info(f"Job {job.id} started (attempt {job.attempts}) - {job.link}")
+    heartbeat = asyncio.create_task(jobs.heartbeat(job))
+    try:
+        try:
+            await process(bot=bot, services=services, job=job)
+        finally:
+            heartbeat.cancel()
+    except Exception:
+        error = traceback.format_exc()
+        logger.error(f"Job {job.id} failed - {error}")
+        if not await jobs.fail(job, error=error):
+            await bot.send_message(
+                chat_id=job.chat_id,
+                text=dict(
+                    en="Something went wrong", ru="Чот сломалось, попробуй позже"
+                ).get(job.language_code, "Чот сломалось, попробуй позже"),
+            )
+    else:
+        await jobs.complete(job)
+        logger.info(f"Job {job.id} done")
+
+
+async def run_slot(bot: Bot, services: Services, jobs: JobQueue) -> None:
+    poll_interval = float(os.environ.get("WORKER_POLL_INTERVAL", 1))
+    max_backoff = float(os.environ.get("WORKER_MAX_BACKOFF", 60))
+    backoff = poll_interval
+    while True:
+        try:
+            job = await jobs.claim()
+            if job is None:
+                await asyncio.sleep(poll_interval)
+                continue
+            await run_job(bot=bot, services=services, jobs=jobs, job=job)
+        except Exception:
+            # A DB or Telegram hiccup must not take the whole worker down; an
+            # unfinished job is reclaimed once its lease runs out.
+            logger.exception(f"Worker slot error, retrying in {backoff:.0f}s")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, max_backoff)
+        else:
+            backoff = poll_interval
+
+
+async def main() -> None:
+    bot = Bot(os.environ.get("TELEGRAM_TOKEN"), parse_mode=ParseMode.HTML)
+    services = Services.create()
+    await services.start()
+    try:
+        await asyncio.gather(
+            *(
+                run_slot(bot=bot, services=services, jobs=services.jobs)
+                for _ in range(int(os.environ.get("WORKER_CONCURRENCY", 4)))
+            )
+        )
+    finally:
+        await services.stop()
+        await bot.session.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, stream=sys.stdout)
+    asyncio.run(main())